@@ -0,0 +1,150 @@
+"""
+Long-running worker mode: the pipeline behind a small HTTP API.
+
+One Container serves the whole process, so S3/DynamoDB clients, the Bluesky
+session and the secret cache stay warm for its lifetime. Unless
+WORKER_SCHEDULER is off, an internal scheduler runs fetch, prepare and post
+on fixed intervals, taking the place of the EventBridge rules. Run it with:
+
+    python -m app.api
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+from app.container import Container, get_container
+from app.utils.call_accounting import call_counter
+from app.utils.deadline import Deadline, deadline_scope
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(container: Container = None) -> FastAPI:
+    container = container or get_container()
+    settings = container.settings
+    # The services are not built for concurrent use, so pipeline runs take
+    # turns; status reads don't need to wait for them
+    pipeline_lock = asyncio.Lock()
+
+    async def run(name: str, job):
+        """Run a pipeline step off the event loop, one at a time"""
+        async with pipeline_lock:
+
+            def counted():
+                call_counter.reset()
+                try:
+                    with deadline_scope(Deadline()) as deadline:
+                        return job(), deadline
+                finally:
+                    call_counter.log_summary(name)
+
+            return await asyncio.to_thread(counted)
+
+    async def every(seconds: int, name: str, job):
+        while True:
+            try:
+                await run(name, job)
+            except Exception as e:
+                logger.error(f"Error in scheduled {name}: {str(e)}")
+            await asyncio.sleep(seconds)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        tasks = []
+        if settings.WORKER_SCHEDULER:
+            scheduler = container.scheduler
+            jobs = [
+                (
+                    settings.WORKER_FETCH_INTERVAL_SECONDS,
+                    "fetch_comics",
+                    scheduler.fetch_new_comics,
+                ),
+                (
+                    settings.WORKER_PREPARE_INTERVAL_SECONDS,
+                    "prepare_posts",
+                    scheduler.prepare_schedule,
+                ),
+                (
+                    settings.WORKER_POST_INTERVAL_SECONDS,
+                    "create_post",
+                    scheduler.create_post,
+                ),
+            ]
+            tasks = [asyncio.create_task(every(*job)) for job in jobs]
+            logger.info("Worker scheduler started")
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    app = FastAPI(title="CalvinBot worker", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "timestamp": datetime.now().isoformat()}
+
+    @app.get("/status")
+    async def status():
+        report = await asyncio.to_thread(container.scheduler.get_status)
+        return {**report, "timestamp": datetime.now().isoformat()}
+
+    @app.post("/fetch")
+    async def fetch(count: Optional[int] = None):
+        fetched, deadline = await run(
+            "fetch_comics", lambda: container.scheduler.fetch_new_comics(count)
+        )
+        return {
+            "message": f"Successfully fetched {fetched} comics",
+            "fetched": fetched,
+            "complete": not deadline.interrupted,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @app.post("/prepare")
+    async def prepare(days: Optional[int] = None):
+        prepared, _ = await run(
+            "prepare_posts", lambda: container.scheduler.prepare_schedule(days)
+        )
+        return {
+            "message": f"Successfully prepared {prepared} posts",
+            "prepared": prepared,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @app.post("/post")
+    async def post():
+        result, _ = await run("create_post", container.scheduler.create_post)
+        if not result:
+            raise HTTPException(
+                status_code=400,
+                detail="No posts created - no unposted comics available",
+            )
+        return {
+            "message": "Successfully created post",
+            "postId": str(result.get("uri", "")),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    return app
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    container = get_container()
+    uvicorn.run(
+        create_app(container),
+        host=container.settings.WORKER_HOST,
+        port=container.settings.WORKER_PORT,
+    )
+
+
+if __name__ == "__main__":
+    main()
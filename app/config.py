@@ -1,31 +1,69 @@
-import os
 from functools import lru_cache
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    """
+    Frozen configuration snapshot, read from the environment once per container
+    and passed to services through their constructors. Secrets are not part of
+    it; they are fetched lazily through app.services.secret_service.
+    """
+
+    # frozen: one resolved snapshot; env_file: don't load .env file in Lambda
+    model_config = SettingsConfigDict(frozen=True, env_file=None)
+
     # DynamoDB settings (for storing comic records)
-    DYNAMODB_TABLE: str = os.getenv("DYNAMODB_TABLE", "Comics")
+    DYNAMODB_TABLE: str = "Comics"
+    STATE_TABLE: str = "ComicState"
 
-    # AWS settings
-    AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
-    AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
-    AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
-    S3_BUCKET_NAME: str = os.getenv("S3_BUCKET_NAME", "")
+    # AWS settings (credentials come from the IAM role, not from here)
+    AWS_REGION: str = "us-east-1"
+    S3_BUCKET_NAME: str = ""
 
     # Bluesky settings
-    BLUESKY_USERNAME: str = os.getenv("BLUESKY_USERNAME", "")
-    BLUESKY_PASSWORD: str = os.getenv("BLUESKY_PASSWORD", "")
+    BLUESKY_USERNAME: str = ""
     BLUESKY_API_URL: str = "https://bsky.social/xrpc/"
+    # Retries for idempotent calls, and the ratelimit-remaining level below which
+    # containers share one rate-limit budget through the state table
+    BLUESKY_MAX_RETRIES: int = 3
+    BLUESKY_MAX_BACKOFF_SECONDS: int = 20
+    RATE_LIMIT_SHARED_BELOW: int = 25
+
+    # Secret settings: with a prefix (e.g. "/calvin-bot/") secrets are read from
+    # SSM Parameter Store, otherwise from environment variables of the same name
+    SECRETS_PARAMETER_PREFIX: str = ""
+    SECRETS_TTL_SECONDS: int = 900
 
     # Application settings
     USE_S3_STORAGE: bool = True
     MIN_HOURS_BETWEEN_POSTS: int = 8
+    SCHEDULE_DAYS_AHEAD: int = 3
+    BACKLOG_LOW_WATER_MARK: int = 3
+    BACKLOG_HIGH_WATER_MARK: int = 10
+
+    # Ingest image checks: reject images narrower than this, and images whose
+    # perceptual hash is this many bits or fewer from a stored strip or placeholder
+    IMAGE_MIN_WIDTH: int = 200
+    IMAGE_DUPLICATE_DISTANCE: int = 24
+
+    # Deadline settings: stop this long before the Lambda timeout (AWS calls are
+    # bounded to finish within it), only start a strip with this much time
+    # left, optionally re-invoke to finish the rest
+    DEADLINE_RESERVE_MS: int = 5000
+    FETCH_STRIP_SECONDS: int = 15
+    REENQUEUE_ON_DEADLINE: bool = False
+    MAX_CONTINUATIONS: int = 5
     DEBUG: bool = False
 
-    class Config:
-        env_file = None  # Don't load .env file in Lambda
+    # Worker/API mode (app.api): listen address, and whether its internal
+    # scheduler runs the pipeline on these intervals instead of EventBridge
+    WORKER_HOST: str = "127.0.0.1"
+    WORKER_PORT: int = 8000
+    WORKER_SCHEDULER: bool = True
+    WORKER_FETCH_INTERVAL_SECONDS: int = 3600
+    WORKER_PREPARE_INTERVAL_SECONDS: int = 3600
+    WORKER_POST_INTERVAL_SECONDS: int = 300
 
 
 @lru_cache()
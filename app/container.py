@@ -0,0 +1,140 @@
+import logging
+from functools import lru_cache
+
+import boto3
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.services.bluesky_service import BlueskyService
+from app.services.calendar_service import CalendarService
+from app.services.catalog_service import CatalogService
+from app.services.comic_service import ComicService
+from app.services.image_index_service import ImageIndexService
+from app.services.scheduler_service import SchedulerService
+from app.services.secret_service import SecretService
+from app.services.storage_service import StorageService
+from app.services.sweeper_service import SweeperService
+from app.utils.call_accounting import instrument_boto3_client
+from app.utils.post_formatter import PostFormatter
+
+logger = logging.getLogger(__name__)
+
+
+class Container:
+    """
+    Composition root for the service graph.
+
+    Each service is built on first use and then shared, so one StorageService
+    (and its S3 client), one Bluesky session and one secret cache serve every
+    warm invocation. The DynamoDB layer is bound to the container's settings
+    too, so a container built from alternate settings (e.g. benchmark tables)
+    reads and writes those tables. Pass any service as a keyword argument to
+    swap in a fake:
+
+        Container(settings, bluesky_service=FakeBluesky()).scheduler
+    """
+
+    def __init__(self, settings: Settings = None, **overrides):
+        self.settings = settings or get_settings()
+        self._services = dict(overrides)
+        # The DB layer is module-level; point it at this container's tables
+        dynamodb.init_db(self.settings)
+
+    def _provide(self, name: str, factory):
+        if name not in self._services:
+            logger.info(f"Building {name}")
+            self._services[name] = factory()
+        return self._services[name]
+
+    @property
+    def lambda_client(self):
+        return self._provide(
+            "lambda_client",
+            lambda: instrument_boto3_client(
+                boto3.client("lambda", region_name=self.settings.AWS_REGION)
+            ),
+        )
+
+    @property
+    def secret_service(self) -> SecretService:
+        return self._provide("secret_service", lambda: SecretService(self.settings))
+
+    @property
+    def storage_service(self) -> StorageService:
+        return self._provide("storage_service", lambda: StorageService(self.settings))
+
+    @property
+    def post_formatter(self) -> PostFormatter:
+        return self._provide("post_formatter", PostFormatter)
+
+    @property
+    def image_index(self) -> ImageIndexService:
+        return self._provide("image_index", lambda: ImageIndexService(self.settings))
+
+    @property
+    def comic_service(self) -> ComicService:
+        return self._provide(
+            "comic_service",
+            lambda: ComicService(
+                self.settings,
+                storage_service=self.storage_service,
+                image_index=self.image_index,
+            ),
+        )
+
+    @property
+    def bluesky_service(self) -> BlueskyService:
+        return self._provide(
+            "bluesky_service",
+            lambda: BlueskyService(
+                self.settings,
+                storage_service=self.storage_service,
+                secret_service=self.secret_service,
+            ),
+        )
+
+    @property
+    def calendar_service(self) -> CalendarService:
+        return self._provide(
+            "calendar_service",
+            lambda: CalendarService(
+                self.comic_service, self.settings, post_formatter=self.post_formatter
+            ),
+        )
+
+    @property
+    def sweeper_service(self) -> SweeperService:
+        return self._provide(
+            "sweeper_service",
+            lambda: SweeperService(self.settings, storage_service=self.storage_service),
+        )
+
+    @property
+    def catalog_service(self) -> CatalogService:
+        return self._provide(
+            "catalog_service",
+            lambda: CatalogService(
+                self.settings,
+                storage_service=self.storage_service,
+                image_index=self.image_index,
+            ),
+        )
+
+    @property
+    def scheduler(self) -> SchedulerService:
+        return self._provide(
+            "scheduler",
+            lambda: SchedulerService(
+                self.settings,
+                comic_service=self.comic_service,
+                bluesky_service=self.bluesky_service,
+                calendar_service=self.calendar_service,
+                post_formatter=self.post_formatter,
+            ),
+        )
+
+
+@lru_cache()
+def get_container() -> Container:
+    """One container per Lambda execution environment"""
+    return Container()
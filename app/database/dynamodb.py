@@ -1,44 +1,541 @@
-import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
 
 import boto3
 from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
 
-DYNAMODB_REGION = os.getenv("AWS_REGION", "us-east-1")
-TABLE_NAME = os.getenv("DYNAMODB_TABLE", "Comics")
+from app.config import Settings, get_settings
+from app.database import streams
+from app.utils.call_accounting import instrument_boto3_client
+from app.utils.deadline import boto3_config, guard_boto3_client
 
-dynamodb = boto3.resource("dynamodb", region_name=DYNAMODB_REGION)
-table = dynamodb.Table(TABLE_NAME)
+# Projections for callers that don't need whole items
+KEY_ATTRIBUTES = ("strip_date",)
+POST_ATTRIBUTES = ("strip_date", "title", "local_path")
 
+LAST_POST_KEY = {"pk": "LAST_POST"}
+# Backlog counters, kept in step with the Comics table by transactional ADDs
+STATS_KEY = {"pk": "STATS"}
 
-def init_db():
-    pass
+# In-process stream consumers, used where no real DynamoDB stream exists
+_stream_listeners = []
+
+# The settings snapshot the tables below are bound to
+_bound_settings = None
+
+
+def init_db(settings: Settings = None):
+    """
+    Bind the module's tables to a settings snapshot. The Container calls this
+    with its own settings; rebinding to an equal snapshot is a no-op, so warm
+    invocations keep their clients.
+    """
+    global DYNAMODB_REGION, TABLE_NAME, STATE_TABLE_NAME
+    global dynamodb, table, state_table, _bound_settings
+
+    settings = settings or get_settings()
+    if settings == _bound_settings:
+        return
+    _bound_settings = settings
+    DYNAMODB_REGION = settings.AWS_REGION
+    TABLE_NAME = settings.DYNAMODB_TABLE
+    # Bookkeeping table (posting calendar, spacing marker), keyed by "pk"
+    STATE_TABLE_NAME = settings.STATE_TABLE
+
+    dynamodb = boto3.resource(
+        "dynamodb",
+        region_name=DYNAMODB_REGION,
+        config=boto3_config(settings.DEADLINE_RESERVE_MS),
+    )
+    guard_boto3_client(instrument_boto3_client(dynamodb.meta.client))
+    table = dynamodb.Table(TABLE_NAME)
+    state_table = dynamodb.Table(STATE_TABLE_NAME)
+
+
+init_db()
+
+
+def _projection(attributes: Iterable[str]) -> dict:
+    """Build ProjectionExpression kwargs, aliasing names to dodge reserved words"""
+    names = {f"#p{i}": name for i, name in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def _is_conditional_check_failure(error: ClientError) -> bool:
+    code = error.response["Error"]["Code"]
+    if code == "TransactionCanceledException":
+        return any(
+            reason.get("Code") == "ConditionalCheckFailed"
+            for reason in error.response.get("CancellationReasons", [])
+        )
+    return code == "ConditionalCheckFailedException"
+
+
+def _stats_update(adds: dict, timestamp_name: Optional[str] = None) -> dict:
+    """TransactWriteItems entry adding to STATS counters, optionally stamping a time"""
+    names = {f"#c{i}": name for i, name in enumerate(adds)}
+    values = {f":c{i}": value for i, value in enumerate(adds.values())}
+    expression = "ADD " + ", ".join(
+        f"{name} {value}" for name, value in zip(names, values)
+    )
+    if timestamp_name:
+        expression += f" SET {timestamp_name} = :now"
+        values[":now"] = datetime.utcnow().isoformat()
+    return {
+        "Update": {
+            "TableName": STATE_TABLE_NAME,
+            "Key": STATS_KEY,
+            "UpdateExpression": expression,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+    }
+
+
+def _scan_pages(**kwargs):
+    """Yield every page of a scan, following LastEvaluatedKey"""
+    while True:
+        response = table.scan(**kwargs)
+        yield response
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
 
 
 def save_comic(item: dict):
-    """Save a comic record to DynamoDB."""
-    table.put_item(Item=item)
+    """
+    Save a comic record to DynamoDB unless one already exists for its
+    strip_date; returns None when the record was already there. The STATS
+    counters are updated in the same transaction.
+    """
+    year = f"year_{item['strip_date'][:4]}"
+    try:
+        dynamodb.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Put": {
+                        "TableName": TABLE_NAME,
+                        "Item": item,
+                        "ConditionExpression": "attribute_not_exists(strip_date)",
+                    }
+                },
+                _stats_update(
+                    {
+                        "total": 1,
+                        "unposted": 0 if item.get("posted") else 1,
+                        "posted": 1 if item.get("posted") else 0,
+                        year: 1,
+                    },
+                    "last_fetch_at",
+                ),
+            ]
+        )
+    except ClientError as e:
+        if _is_conditional_check_failure(e):
+            return None
+        raise
     return item
 
 
-def get_comic_by_strip_date(strip_date: str):
+def get_comic_by_strip_date(
+    strip_date: str, attributes: Optional[Iterable[str]] = None
+):
     """Retrieve a comic by its strip_date (primary key)."""
-    response = table.get_item(Key={"strip_date": strip_date})
+    kwargs = _projection(attributes) if attributes else {}
+    response = table.get_item(Key={"strip_date": strip_date}, **kwargs)
     return response.get("Item")
 
 
-def get_unposted_comics():
+def get_comics_by_strip_dates(
+    strip_dates: Iterable[str], attributes: Optional[Iterable[str]] = None
+) -> dict:
+    """Batch-get comics, returned as {strip_date: item}; missing keys are absent."""
+    keys = [{"strip_date": strip_date} for strip_date in strip_dates]
+    projection = _projection(attributes) if attributes else {}
+    comics = {}
+    for start in range(0, len(keys), 100):
+        request = {TABLE_NAME: {"Keys": keys[start : start + 100], **projection}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(TABLE_NAME, []):
+                comics[item["strip_date"]] = item
+            request = response.get("UnprocessedKeys")
+    return comics
+
+
+def iter_comics(attributes: Optional[Iterable[str]] = None):
+    """Yield every comic record, page by page."""
+    kwargs = _projection(attributes) if attributes else {}
+    for page in _scan_pages(**kwargs):
+        yield from page.get("Items", [])
+
+
+def iter_comic_segment(segment: int, total_segments: int):
+    """
+    Yield pages of one segment of a parallel scan over the Comics table.
+    Uses the resource's low-level client, which unlike the Table resource is
+    safe to share between threads and still (de)serializes attribute values.
+    """
+    client = dynamodb.meta.client
+    kwargs = {
+        "TableName": TABLE_NAME,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+    }
+    while True:
+        response = client.scan(**kwargs)
+        yield response.get("Items", [])
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def put_comics(items: Iterable[dict]) -> int:
+    """Bulk-write comic records with BatchWriteItem, replacing existing ones."""
+    count = 0
+    with table.batch_writer(overwrite_by_pkeys=["strip_date"]) as batch:
+        for item in items:
+            batch.put_item(Item=item)
+            count += 1
+    return count
+
+
+def get_unposted_comics(attributes: Optional[Iterable[str]] = None):
     """Return a list of comics where 'posted' is False."""
-    response = table.scan(FilterExpression=Attr("posted").eq(False))
-    return response.get("Items", [])
-
-
-def mark_as_posted(strip_date: str):
-    """Mark a comic as posted given its strip_date."""
-    table.update_item(
-        Key={"strip_date": strip_date},
-        UpdateExpression="SET posted = :val, updated_at = :now",
-        ExpressionAttributeValues={
-            ":val": True,
-            ":now": __import__("datetime").datetime.utcnow().isoformat(),
-        },
+    kwargs = _projection(attributes) if attributes else {}
+    items = []
+    for page in _scan_pages(FilterExpression=Attr("posted").eq(False), **kwargs):
+        items.extend(page.get("Items", []))
+    return items
+
+
+def get_unposted_strip_dates():
+    """Return only the keys of unposted comics."""
+    return [
+        item["strip_date"] for item in get_unposted_comics(attributes=KEY_ATTRIBUTES)
+    ]
+
+
+def subscribe(listener):
+    """Feed Comics table changes to an in-process stream (see streams.LocalStream)"""
+    _stream_listeners.append(listener)
+
+
+def unsubscribe(listener):
+    _stream_listeners.remove(listener)
+
+
+def mark_as_posted(strip_date: str) -> bool:
+    """
+    Mark a comic as posted given its strip_date. The STATS counters move from
+    unposted to posted in the same transaction. Returns False, changing
+    nothing, if the comic was already posted (or doesn't exist), so the
+    condition can gate publishing.
+    """
+    was_posted = False
+    now = datetime.utcnow().isoformat()
+    try:
+        dynamodb.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Update": {
+                        "TableName": TABLE_NAME,
+                        "Key": {"strip_date": strip_date},
+                        "UpdateExpression": "SET posted = :val, updated_at = :now",
+                        "ConditionExpression": "attribute_exists(strip_date) "
+                        "AND (attribute_not_exists(posted) OR posted <> :val)",
+                        "ExpressionAttributeValues": {
+                            ":val": True,
+                            ":now": now,
+                        },
+                    }
+                },
+                _stats_update({"unposted": -1, "posted": 1}, "last_post_at"),
+            ]
+        )
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            raise
+        was_posted = True
+    if _stream_listeners:
+        record = streams.posted_record(strip_date, was_posted)
+        for listener in _stream_listeners:
+            listener(record)
+    return not was_posted
+
+
+def unmark_as_posted(strip_date: str):
+    """Undo mark_as_posted when the post it gated could not be published."""
+    try:
+        dynamodb.meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Update": {
+                        "TableName": TABLE_NAME,
+                        "Key": {"strip_date": strip_date},
+                        "UpdateExpression": "SET posted = :val, updated_at = :now",
+                        "ConditionExpression": "posted = :was",
+                        "ExpressionAttributeValues": {
+                            ":val": False,
+                            ":was": True,
+                            ":now": datetime.utcnow().isoformat(),
+                        },
+                    }
+                },
+                _stats_update({"unposted": 1, "posted": -1}),
+            ]
+        )
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            raise
+
+
+def get_stats() -> dict:
+    """
+    Retrieve the STATS item: backlog counters, per-year histogram, timestamps.
+    An item never seeded by rebuild_stats() is recounted first: it is either
+    missing or was created by the counter ADDs alone on a table that predates
+    STATS, and its counts would stay wrong for good.
+    """
+    item = state_table.get_item(Key=STATS_KEY).get("Item")
+    if not item or not item.get("initialized"):
+        return rebuild_stats(previous=item)
+    return item
+
+
+def rebuild_stats(previous: Optional[dict] = None) -> dict:
+    """
+    Recount STATS from a keys-and-posted scan, e.g. after a bulk import,
+    keeping the fetch/post timestamps of the previous item.
+    """
+    stats = {"total": 0, "unposted": 0, "posted": 0}
+    for item in iter_comics(attributes=("strip_date", "posted")):
+        year = f"year_{item['strip_date'][:4]}"
+        posted = "posted" if item.get("posted") else "unposted"
+        stats["total"] += 1
+        stats[posted] += 1
+        stats[year] = stats.get(year, 0) + 1
+    for name in ("last_fetch_at", "last_post_at"):
+        if previous and name in previous:
+            stats[name] = previous[name]
+    stats["initialized"] = True
+    state_table.put_item(Item={**STATS_KEY, **stats})
+    return stats
+
+
+def _slot_key(slot_time: str) -> dict:
+    return {"pk": f"SLOT#{slot_time}"}
+
+
+def get_schedule_entry(slot_time: str):
+    """Retrieve the prepared post for a calendar slot."""
+    response = state_table.get_item(Key=_slot_key(slot_time))
+    return response.get("Item")
+
+
+def get_schedule_entries(slot_times: Iterable[str]) -> dict:
+    """Batch-get prepared posts, returned as {slot_time: item}."""
+    keys = [_slot_key(slot_time) for slot_time in slot_times]
+    entries = {}
+    for start in range(0, len(keys), 100):
+        request = {STATE_TABLE_NAME: {"Keys": keys[start : start + 100]}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(STATE_TABLE_NAME, []):
+                entries[item["slot_time"]] = item
+            request = response.get("UnprocessedKeys")
+    return entries
+
+
+def save_schedule_entry(item: dict) -> bool:
+    """Save a prepared post unless its slot is already taken."""
+    try:
+        state_table.put_item(
+            Item={**item, **_slot_key(item["slot_time"])},
+            ConditionExpression="attribute_not_exists(pk)",
+        )
+        return True
+    except ClientError as e:
+        if _is_conditional_check_failure(e):
+            return False
+        raise
+
+
+def defer_schedule_entry(item: dict, from_slot: str):
+    """
+    Move a prepared post to item's slot, replacing whatever that slot held, and
+    mark the slot it came from as deferred in the same transaction.
+    """
+    dynamodb.meta.client.transact_write_items(
+        TransactItems=[
+            {
+                "Put": {
+                    "TableName": STATE_TABLE_NAME,
+                    # The key comes last so a copied entry's stale pk can't
+                    # redirect the put
+                    "Item": {**item, **_slot_key(item["slot_time"])},
+                }
+            },
+            {
+                "Update": {
+                    "TableName": STATE_TABLE_NAME,
+                    "Key": _slot_key(from_slot),
+                    "UpdateExpression": "SET deferred_to = :to",
+                    "ExpressionAttributeValues": {":to": item["slot_time"]},
+                }
+            },
+        ]
+    )
+
+
+def mark_schedule_entry_posted(slot_time: str, post_uri: str):
+    """Record that a calendar slot has been published."""
+    state_table.update_item(
+        Key=_slot_key(slot_time),
+        UpdateExpression="SET posted = :val, post_uri = :uri",
+        ExpressionAttributeValues={":val": True, ":uri": post_uri},
+    )
+
+
+def claim_post_slot(slot_time: str, earliest_previous: str) -> bool:
+    """
+    Atomically claim a posting slot.
+    Succeeds only if the last claimed slot is at or before earliest_previous,
+    which enforces the minimum spacing between posts with a single write.
+    """
+    try:
+        state_table.update_item(
+            Key=LAST_POST_KEY,
+            UpdateExpression="SET slot_time = :slot",
+            ConditionExpression="attribute_not_exists(slot_time) "
+            "OR slot_time <= :earliest",
+            ExpressionAttributeValues={
+                ":slot": slot_time,
+                ":earliest": earliest_previous,
+            },
+        )
+        return True
+    except ClientError as e:
+        if _is_conditional_check_failure(e):
+            return False
+        raise
+
+
+def release_post_slot(slot_time: str):
+    """Give a claimed slot back after a failed post so it can be retried."""
+    try:
+        state_table.update_item(
+            Key=LAST_POST_KEY,
+            UpdateExpression="REMOVE slot_time",
+            ConditionExpression="slot_time = :slot",
+            ExpressionAttributeValues={":slot": slot_time},
+        )
+    except ClientError as e:
+        if not _is_conditional_check_failure(e):
+            raise
+
+
+def _cursor_key(name: str) -> dict:
+    return {"pk": f"CURSOR#{name}"}
+
+
+def get_cursor(name: str):
+    """Retrieve the saved progress of an interrupted job."""
+    response = state_table.get_item(Key=_cursor_key(name))
+    return response.get("Item")
+
+
+def save_cursor(name: str, **state):
+    """Persist where a job stopped so the next invocation can resume it."""
+    state_table.put_item(
+        Item={
+            **_cursor_key(name),
+            **state,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
     )
+
+
+def clear_cursor(name: str):
+    state_table.delete_item(Key=_cursor_key(name))
+
+
+def _hash_bucket_key(band: int, value: int) -> dict:
+    return {"pk": f"HASH#{band}#{value:02x}"}
+
+
+def get_image_hash_entries(buckets: Iterable[tuple]) -> set:
+    """Batch-get the "<hash>#<label>" entries stored in the given LSH buckets."""
+    keys = [_hash_bucket_key(band, value) for band, value in buckets]
+    entries = set()
+    request = {STATE_TABLE_NAME: {"Keys": keys, "ProjectionExpression": "entries"}}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response["Responses"].get(STATE_TABLE_NAME, []):
+            entries.update(item.get("entries", ()))
+        request = response.get("UnprocessedKeys")
+    return entries
+
+
+def add_image_hash_entry(buckets: Iterable[tuple], entry: str):
+    """Add an entry to every LSH bucket of its hash in one transaction."""
+    dynamodb.meta.client.transact_write_items(
+        TransactItems=[
+            {
+                "Update": {
+                    "TableName": STATE_TABLE_NAME,
+                    "Key": _hash_bucket_key(band, value),
+                    "UpdateExpression": "ADD entries :entry",
+                    "ExpressionAttributeValues": {":entry": {entry}},
+                }
+            }
+            for band, value in buckets
+        ]
+    )
+
+
+def add_image_hash_entries(entries_by_bucket: Dict[tuple, set]):
+    """Bulk-add entries to LSH buckets, one ADD per bucket, e.g. after an import."""
+    for (band, value), entries in entries_by_bucket.items():
+        state_table.update_item(
+            Key=_hash_bucket_key(band, value),
+            UpdateExpression="ADD entries :entries",
+            ExpressionAttributeValues={":entries": set(entries)},
+        )
+
+
+def _rate_limit_key(name: str) -> dict:
+    return {"pk": f"RATELIMIT#{name}"}
+
+
+def save_rate_limit(name: str, remaining: int, reset_at: int):
+    """Publish the rate limit the PDS last reported for an account."""
+    state_table.put_item(
+        Item={**_rate_limit_key(name), "remaining": remaining, "reset_at": reset_at}
+    )
+
+
+def take_rate_limit_token(name: str, now: int) -> bool:
+    """
+    Atomically take one call from an account's shared rate-limit budget.
+    Fails only while the budget is used up and its window has not reset.
+    """
+    try:
+        state_table.update_item(
+            Key=_rate_limit_key(name),
+            UpdateExpression="ADD remaining :minus_one",
+            ConditionExpression="attribute_not_exists(pk) OR remaining > :zero "
+            "OR reset_at <= :now",
+            ExpressionAttributeValues={":minus_one": -1, ":zero": 0, ":now": now},
+        )
+        return True
+    except ClientError as e:
+        if _is_conditional_check_failure(e):
+            return False
+        raise
@@ -2,15 +2,24 @@ from dataclasses import dataclass
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Comic:
     strip_date: str
-    url: str
-    title: str
-    local_path: str
+    url: str = None
+    title: str = None
+    local_path: str = None
     posted: bool = False
     created_at: str = None
     updated_at: str = None
+    image_hash: str = None
+
+    @property
+    def date(self):
+        """The strip's publication date, whatever form strip_date was saved in"""
+        try:
+            return datetime.strptime(self.strip_date, "%Y-%m-%d").date()
+        except ValueError:
+            return datetime.fromisoformat(self.strip_date).date()
 
     def to_item(self):
         now = datetime.utcnow().isoformat()
@@ -22,4 +31,20 @@ class Comic:
             "posted": self.posted,
             "created_at": self.created_at or now,
             "updated_at": self.updated_at or now,
+            "image_hash": self.image_hash,
         }
+
+    @classmethod
+    def from_item(cls, item: dict):
+        """Build a Comic from a (possibly projected) DynamoDB item"""
+        get = item.get
+        return cls(
+            item["strip_date"],
+            get("url"),
+            get("title"),
+            get("local_path"),
+            bool(get("posted", False)),
+            get("created_at"),
+            get("updated_at"),
+            get("image_hash"),
+        )
@@ -0,0 +1,59 @@
+"""
+Helpers for Comics table stream records (NEW_AND_OLD_IMAGES view), plus an
+in-process stand-in for the stream so the refill path runs without AWS.
+"""
+
+from typing import Callable, List
+
+
+def _posted(image: dict) -> bool:
+    return bool(image.get("posted", {}).get("BOOL", False))
+
+
+def is_posted_transition(record: dict) -> bool:
+    """True for a MODIFY record that flips a comic from unposted to posted"""
+    if record.get("eventName") != "MODIFY":
+        return False
+    change = record.get("dynamodb", {})
+    return not _posted(change.get("OldImage", {})) and _posted(
+        change.get("NewImage", {})
+    )
+
+
+def posted_record(strip_date: str, was_posted: bool = False) -> dict:
+    """Build the stream record DynamoDB emits when mark_as_posted runs"""
+    return {
+        "eventName": "MODIFY",
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {
+            "Keys": {"strip_date": {"S": strip_date}},
+            "OldImage": {
+                "strip_date": {"S": strip_date},
+                "posted": {"BOOL": was_posted},
+            },
+            "NewImage": {"strip_date": {"S": strip_date}, "posted": {"BOOL": True}},
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        },
+    }
+
+
+class LocalStream:
+    """
+    Stand-in for a DynamoDB stream with a Lambda trigger.
+    Subscribe it with dynamodb.subscribe(stream.put); records queue up until
+    flush() hands them to the consumer as one batch, like an event source
+    mapping would.
+    """
+
+    def __init__(self, consumer: Callable[[List[dict]], object]):
+        self.consumer = consumer
+        self.pending = []
+
+    def put(self, record: dict):
+        self.pending.append(record)
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return None
+        return self.consumer(batch)
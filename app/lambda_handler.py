@@ -2,24 +2,57 @@ import json
 import logging
 from datetime import datetime
 
-from app.services.scheduler_service import SchedulerService
+from app.container import get_container
+from app.utils.call_accounting import call_counter
+from app.utils.deadline import Deadline, deadline_scope
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
+def _invocation_deadline(context) -> Deadline:
+    settings = get_container().settings
+    return Deadline.from_context(context, reserve_ms=settings.DEADLINE_RESERVE_MS)
+
+
+def _hand_off(event, context, deadline: Deadline) -> bool:
+    """Re-invoke this function asynchronously to finish work the deadline cut short"""
+    container = get_container()
+    settings = container.settings
+    if not (deadline.interrupted and settings.REENQUEUE_ON_DEADLINE):
+        return False
+
+    continuation = int((event or {}).get("continuation", 0)) + 1
+    if continuation > settings.MAX_CONTINUATIONS:
+        logger.warning("Continuation limit reached, leaving the rest to the schedule")
+        return False
+
+    container.lambda_client.invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType="Event",
+        Payload=json.dumps({**(event or {}), "continuation": continuation}),
+    )
+    logger.info(f"Handed remaining work to continuation {continuation}")
+    return True
+
+
 def fetch_comics(event, context):
     """Lambda handler for fetching new comics"""
     try:
         logger.info(f"Starting comic fetch at {datetime.now()}")
-        scheduler = SchedulerService()
-        comics_fetched = scheduler.fetch_new_comics(count=5)
+        call_counter.reset()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)) as deadline:
+            comics_fetched = scheduler.fetch_new_comics()
+        handed_off = _hand_off(event, context, deadline)
 
         return {
             "statusCode": 200,
             "body": json.dumps(
                 {
                     "message": f"Successfully fetched {comics_fetched} comics",
+                    "complete": not deadline.interrupted,
+                    "handedOff": handed_off,
                     "timestamp": datetime.now().isoformat(),
                 }
             ),
@@ -35,14 +68,43 @@ def fetch_comics(event, context):
                 }
             ),
         }
+    finally:
+        call_counter.log_summary("fetch_comics")
+
+
+def refill_backlog(event, context):
+    """Lambda handler for the Comics table stream: refill once posts drain it"""
+    try:
+        call_counter.reset()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)):
+            records = event.get("Records", [])
+            comics_fetched = scheduler.handle_stream_records(records)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "message": f"Successfully fetched {comics_fetched} comics",
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Error in refill_backlog: {str(e)}")
+        raise
+    finally:
+        call_counter.log_summary("refill_backlog")
 
 
 def create_post(event, context):
     """Lambda handler for creating new posts"""
     try:
         logger.info(f"Starting post creation at {datetime.now()}")
-        scheduler = SchedulerService()
-        result = scheduler.create_post()
+        call_counter.reset()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)):
+            result = scheduler.create_post()
 
         if result:
             return {
@@ -76,3 +138,155 @@ def create_post(event, context):
                 }
             ),
         }
+    finally:
+        call_counter.log_summary("create_post")
+
+
+def prepare_posts(event, context):
+    """Lambda handler for filling the upcoming posting calendar"""
+    try:
+        logger.info(f"Starting post preparation at {datetime.now()}")
+        call_counter.reset()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)) as deadline:
+            prepared = scheduler.prepare_schedule(days=(event or {}).get("days"))
+        handed_off = _hand_off(event, context, deadline)
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "message": f"Successfully prepared {prepared} posts",
+                    "complete": not deadline.interrupted,
+                    "handedOff": handed_off,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Error in prepare_posts: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    finally:
+        call_counter.log_summary("prepare_posts")
+
+
+def post_story_arc(event, context):
+    """Lambda handler for posting consecutive strips as one thread"""
+    try:
+        logger.info(f"Starting story arc post at {datetime.now()}")
+        call_counter.reset()
+        start_date = datetime.strptime(event["start_date"], "%Y-%m-%d").date()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)):
+            results = scheduler.post_story_arc(start_date, int(event.get("days", 7)))
+
+        if not results:
+            return {
+                "statusCode": 400,
+                "body": json.dumps(
+                    {
+                        "message": "No posts created - no strips found for the arc",
+                        "timestamp": datetime.now().isoformat(),
+                    }
+                ),
+            }
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "message": f"Successfully posted a thread of {len(results)} posts",
+                    "postIds": [str(result.get("uri", "")) for result in results],
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Error in post_story_arc: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    finally:
+        call_counter.log_summary("post_story_arc")
+
+
+def sweep_orphans(event, context):
+    """Lambda handler for deleting stored images that have no comic record"""
+    try:
+        logger.info(f"Starting orphan sweep at {datetime.now()}")
+        call_counter.reset()
+        sweeper = get_container().sweeper_service
+        with deadline_scope(_invocation_deadline(context)):
+            report = sweeper.sweep(
+                grace_minutes=int((event or {}).get("grace_minutes", 60)),
+                dry_run=bool((event or {}).get("dry_run", False)),
+            )
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    "message": f"Deleted {report['deleted']} orphaned images",
+                    **report,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Error in sweep_orphans: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    finally:
+        call_counter.log_summary("sweep_orphans")
+
+
+def status(event, context):
+    """Lambda handler reporting backlog health from the STATS item"""
+    try:
+        call_counter.reset()
+        scheduler = get_container().scheduler
+        with deadline_scope(_invocation_deadline(context)):
+            report = scheduler.get_status()
+
+        return {
+            "statusCode": 200,
+            "body": json.dumps(
+                {
+                    **report,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Error in status: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps(
+                {
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ),
+        }
+    finally:
+        call_counter.log_summary("status")
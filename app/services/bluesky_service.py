@@ -1,38 +1,74 @@
 import logging
 import mimetypes
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from tempfile import NamedTemporaryFile
+from typing import Callable, List, Optional
 
 import requests
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.services.rate_limiter import RateLimitedError, RateLimiter
+from app.services.secret_service import SecretService
 from app.services.storage_service import StorageService
+from app.utils.call_accounting import instrument_session, xrpc_operation
+from app.utils.deadline import current_deadline, request_timeout, with_current_deadline
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+MAX_IMAGES_PER_POST = 4
+DEFAULT_ALT_TEXT = "Calvin and Hobbes comic strip"
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _is_expired_token(response) -> bool:
+    if response.status_code not in (400, 401):
+        return False
+    try:
+        return response.json().get("error") in ("ExpiredToken", "InvalidToken")
+    except ValueError:
+        return False
 
 
 class BlueskyService:
-    def __init__(self):
-        self.base_url = settings.BLUESKY_API_URL
-        self.session = None
+    def __init__(
+        self,
+        settings: Settings = None,
+        storage_service: StorageService = None,
+        secret_service: SecretService = None,
+    ):
+        self.settings = settings or get_settings()
+        self.base_url = self.settings.BLUESKY_API_URL
+        self.session = instrument_session(
+            requests.Session(), "bluesky", operation_name=xrpc_operation
+        )
         self.jwt = None
         self.did = None
-        self.storage_service = StorageService()
+        self.storage_service = storage_service or StorageService(self.settings)
+        self.secret_service = secret_service or SecretService(self.settings)
+        self.rate_limiter = RateLimiter(
+            self.settings.BLUESKY_USERNAME or "default", self.settings
+        )
+        self.sleep = time.sleep
+        self._login_lock = threading.Lock()
 
     def login(self):
         """Login to Bluesky and get DID"""
         try:
             logger.info("Attempting to login to Bluesky")
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}com.atproto.server.createSession",
                 json={
-                    "identifier": settings.BLUESKY_USERNAME,
-                    "password": settings.BLUESKY_PASSWORD,
+                    "identifier": self.settings.BLUESKY_USERNAME,
+                    "password": self.secret_service.get("BLUESKY_PASSWORD"),
                 },
-                timeout=30,
+                timeout=request_timeout(30),
             )
+            if response.status_code == 401:
+                # The password may have been rotated since it was cached
+                self.secret_service.invalidate("BLUESKY_PASSWORD")
             response.raise_for_status()
             auth_data = response.json()
             self.jwt = auth_data.get("accessJwt")
@@ -43,121 +79,265 @@ class BlueskyService:
             logger.error(f"Failed to login to Bluesky: {str(e)}")
             raise Exception(f"Failed to login to Bluesky: {str(e)}")
 
+    def _authed_post(
+        self, method: str, headers: dict = None, idempotent=False, **kwargs
+    ):
+        """
+        POST an authenticated XRPC call. The service outlives warm invocations,
+        so an expired access token triggers one fresh login and a retry; calls
+        racing on the same expired token share that login.
+        Idempotent calls are retried with jittered backoff on 429 and 5xx while
+        the wait fits the invocation deadline; a 429 that can't be waited out
+        raises RateLimitedError.
+        """
+        relogged, retries = False, 0
+        while True:
+            self.rate_limiter.acquire()
+            jwt = self.jwt
+            response = self.session.post(
+                f"{self.base_url}{method}",
+                headers={**(headers or {}), "Authorization": f"Bearer {jwt}"},
+                timeout=request_timeout(30),
+                **kwargs,
+            )
+            self.rate_limiter.update(response)
+            if not relogged and _is_expired_token(response):
+                with self._login_lock:
+                    if self.jwt == jwt:  # no other thread has logged in yet
+                        logger.info("Bluesky access token expired, logging in again")
+                        self.login()
+                relogged = True
+                continue
+            if response.status_code not in RETRYABLE_STATUSES:
+                return response
+
+            wait = self._retry_wait(response, retries)
+            if (
+                idempotent
+                and retries < self.settings.BLUESKY_MAX_RETRIES
+                and wait <= self.settings.BLUESKY_MAX_BACKOFF_SECONDS
+                and current_deadline().has_time_for(wait + 1)
+            ):
+                logger.warning(
+                    f"{method} returned {response.status_code}, "
+                    f"retrying in {wait:.1f}s"
+                )
+                self.sleep(wait)
+                retries += 1
+                continue
+            if response.status_code == 429:
+                raise RateLimitedError(
+                    f"Bluesky rate limit reached on {method}",
+                    self.rate_limiter.reset_at or time.time() + wait,
+                )
+            return response
+
+    def _retry_wait(self, response, retries: int) -> float:
+        """Seconds until the rate-limit window resets, else exponential backoff"""
+        if response.status_code == 429 and self.rate_limiter.reset_at:
+            return max(0.0, self.rate_limiter.reset_at - time.time())
+        cap = min(self.settings.BLUESKY_MAX_BACKOFF_SECONDS, 2**retries)
+        return random.uniform(cap / 2, cap)  # nosec
+
+    def _load_image(self, image_path: str):
+        """Read image bytes from S3 or local disk, returning (data, mime_type)"""
+        if image_path.startswith("s3://"):
+            image_data = self.storage_service.get_file_content(image_path)
+            if not image_data:
+                raise FileNotFoundError(f"Image file not found in S3: {image_path}")
+        else:
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image file not found: {image_path}")
+            with open(image_path, "rb") as f:
+                image_data = f.read()
+
+        mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+        return image_data, mime_type
+
     def upload_image(self, image_path: str):
         """Upload an image to Bluesky"""
         try:
             if not self.jwt:
                 self.login()
 
-            # Handle S3 paths
-            temp_file_path = None
-            try:
-                if image_path.startswith("s3://"):
-                    # Get content from S3
-                    image_data = self.storage_service.get_file_content(image_path)
-                    if not image_data:
-                        raise FileNotFoundError(
-                            f"Image file not found in S3: {image_path}"
-                        )
-
-                    # Save to temporary file
-                    with NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-                        temp_file.write(image_data)
-                        temp_file.flush()
-                        temp_file_path = temp_file.name
-                        image_path = temp_file_path
-
-                if not os.path.exists(image_path):
-                    raise FileNotFoundError(f"Image file not found: {image_path}")
-
-                mime_type = mimetypes.guess_type(image_path)[0]
-                if not mime_type:
-                    mime_type = "image/png"
-
-                logger.info(f"Uploading image: {image_path}")
-
-                with open(image_path, "rb") as f:
-                    image_data = f.read()
-
-                response = requests.post(
-                    f"{self.base_url}com.atproto.repo.uploadBlob",
-                    headers={
-                        "Authorization": f"Bearer {self.jwt}",
-                        "Content-Type": mime_type,
-                    },
-                    data=image_data,
-                    timeout=30,
-                )
-                response.raise_for_status()
-                logger.info("Successfully uploaded image")
-                return response.json()
-
-            finally:
-                # Clean up temporary file if it was created
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to cleanup temporary file: {e}")
+            image_data, mime_type = self._load_image(image_path)
+
+            logger.info(f"Uploading image: {image_path}")
+
+            # Blobs are content-addressed, so a repeated upload is harmless
+            response = self._authed_post(
+                "com.atproto.repo.uploadBlob",
+                headers={"Content-Type": mime_type},
+                data=image_data,
+                idempotent=True,
+            )
+            response.raise_for_status()
+            logger.info("Successfully uploaded image")
+            return response.json()
 
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Failed to upload image: {str(e)}")
             raise Exception(f"Failed to upload image: {str(e)}")
 
+    def upload_images(self, image_paths: List[str]):
+        """Upload several images concurrently, returning blobs in input order"""
+        if not self.jwt:
+            self.login()
+        with ThreadPoolExecutor(max_workers=MAX_IMAGES_PER_POST) as pool:
+            return list(pool.map(with_current_deadline(self.upload_image), image_paths))
+
     def _format_datetime(self, dt: datetime) -> str:
         """Format datetime in RFC-3339 format with 'Z' timezone indicator"""
         return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
-    def create_post(self, text: str, image_path: str = None):
-        """Create a post on Bluesky"""
+    @staticmethod
+    def _images_embed(blobs: list, alt_texts: Optional[List[str]] = None) -> dict:
+        alt_texts = alt_texts or []
+        return {
+            "$type": "app.bsky.embed.images",
+            "images": [
+                {
+                    "alt": alt_texts[i] if i < len(alt_texts) else DEFAULT_ALT_TEXT,
+                    "image": blob["blob"],
+                }
+                for i, blob in enumerate(blobs)
+            ],
+        }
+
+    def _create_record(
+        self, text: str, embed: dict = None, reply: dict = None, facets: list = None
+    ):
+        """Write an app.bsky.feed.post record and return its uri/cid"""
+        post_data = {
+            "collection": "app.bsky.feed.post",
+            "repo": self.did,
+            "record": {
+                "text": text,
+                "$type": "app.bsky.feed.post",
+                "createdAt": self._format_datetime(datetime.utcnow()),
+            },
+        }
+        if embed:
+            post_data["record"]["embed"] = embed
+        if reply:
+            post_data["record"]["reply"] = reply
+        if facets:
+            post_data["record"]["facets"] = facets
+
+        logger.info(f"Sending post to Bluesky using DID: {self.did}")
+        logger.debug(f"Post data: {post_data}")
+
+        response = self._authed_post("com.atproto.repo.createRecord", json=post_data)
+        response.raise_for_status()
+        return response.json()
+
+    def create_post(
+        self,
+        text: str,
+        image_path: str = None,
+        image_paths: List[str] = None,
+        alt_texts: List[str] = None,
+        reply: dict = None,
+        facets: list = None,
+    ):
+        """
+        Create a post on Bluesky with up to four images.
+        reply takes {"root": strong_ref, "parent": strong_ref} to post in a thread;
+        facets are rich-text facets (e.g. hashtags) already indexed into text.
+        """
         try:
             if not self.jwt or not self.did:
                 self.login()
 
             logger.info(f"Creating post with text length: {len(text)}")
 
-            post_data = {
-                "collection": "app.bsky.feed.post",
-                "repo": self.did,
-                "record": {
-                    "text": text,
-                    "$type": "app.bsky.feed.post",
-                    "createdAt": self._format_datetime(datetime.utcnow()),
-                },
-            }
-
+            image_paths = list(image_paths or [])
             if image_path:
+                image_paths.insert(0, image_path)
+            if len(image_paths) > MAX_IMAGES_PER_POST:
+                raise ValueError(
+                    f"A post can carry at most {MAX_IMAGES_PER_POST} images"
+                )
+
+            embed = None
+            if image_paths:
                 try:
-                    blob = self.upload_image(image_path)
-                    post_data["record"]["embed"] = {
-                        "$type": "app.bsky.embed.images",
-                        "images": [
-                            {
-                                "alt": "Calvin and Hobbes comic strip",
-                                "image": blob["blob"],
-                            }
-                        ],
-                    }
+                    blobs = self.upload_images(image_paths)
+                    embed = self._images_embed(blobs, alt_texts)
+                except RateLimitedError:
+                    raise
                 except Exception as e:
                     logger.error(f"Failed to upload image for post: {str(e)}")
                     raise Exception(f"Failed to upload image for post: {str(e)}")
 
-            logger.info(f"Sending post to Bluesky using DID: {self.did}")
-            logger.debug(f"Post data: {post_data}")
-
-            response = requests.post(
-                f"{self.base_url}com.atproto.repo.createRecord",
-                headers={"Authorization": f"Bearer {self.jwt}"},
-                json=post_data,
-                timeout=30,
-            )
-            response.raise_for_status()
+            result = self._create_record(text, embed, reply, facets)
             logger.info("Successfully created post")
-            return response.json()
+            return result
 
+        except RateLimitedError:
+            raise
         except Exception as e:
             logger.error(f"Failed to create post: {str(e)}")
-            if hasattr(e, "response"):
+            if getattr(e, "response", None) is not None:
                 logger.error(f"HTTP Status Code: {e.response.status_code}")
                 logger.error(f"Response Text: {e.response.text}")
             raise Exception(f"Failed to create post: {str(e)}")
+
+    def create_thread(self, posts: List[dict], on_posted: Callable = None):
+        """
+        Publish posts as a reply chain.
+
+        Each post is {"text": ..., "image_paths": [...], "alt_texts": [...]},
+        optionally with "facets".
+        Every image in the thread is uploaded up front on a shared pool, so
+        later posts' uploads overlap with earlier posts' record creation.
+        Replies need the parent's CID, which is only known once its record is
+        written, so records are created one at a time. on_posted(index, result)
+        is called after each post so callers can checkpoint partial threads.
+        """
+        try:
+            if not self.jwt or not self.did:
+                self.login()
+
+            for post in posts:
+                if len(post.get("image_paths", [])) > MAX_IMAGES_PER_POST:
+                    raise ValueError(
+                        f"A post can carry at most {MAX_IMAGES_PER_POST} images"
+                    )
+
+            results = []
+            root = parent = None
+            upload = with_current_deadline(self.upload_image)
+            with ThreadPoolExecutor(max_workers=MAX_IMAGES_PER_POST) as pool:
+                uploads = [
+                    [pool.submit(upload, path) for path in paths]
+                    for paths in (post.get("image_paths", []) for post in posts)
+                ]
+                for index, post in enumerate(posts):
+                    blobs = [future.result() for future in uploads[index]]
+                    embed = (
+                        self._images_embed(blobs, post.get("alt_texts"))
+                        if blobs
+                        else None
+                    )
+                    reply = {"root": root, "parent": parent} if root else None
+                    result = self._create_record(
+                        post["text"], embed, reply, post.get("facets")
+                    )
+
+                    parent = {"uri": result["uri"], "cid": result["cid"]}
+                    root = root or parent
+                    results.append(result)
+                    if on_posted:
+                        on_posted(index, result)
+
+            logger.info(f"Successfully created thread of {len(results)} posts")
+            return results
+
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to create thread: {str(e)}")
+            raise Exception(f"Failed to create thread: {str(e)}")
@@ -0,0 +1,194 @@
+import logging
+import random
+from datetime import datetime, timedelta
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.database.models import Comic
+from app.services.comic_service import ComicService
+from app.utils.deadline import current_deadline
+from app.utils.post_formatter import PostFormatter
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class CalendarService:
+    """
+    Precomputed posting calendar.
+
+    Posting slots are aligned to MIN_HOURS_BETWEEN_POSTS boundaries (UTC), so
+    each slot is exactly one spacing apart. prepare() fills upcoming slots with
+    a strip and its finished post text and facets; at post time the current slot is a
+    single keyed lookup. The first slot of each day is reserved for an
+    "on this day" anniversary strip.
+    """
+
+    def __init__(
+        self,
+        comic_service: ComicService = None,
+        settings: Settings = None,
+        post_formatter: PostFormatter = None,
+    ):
+        self.settings = settings or get_settings()
+        self.comic_service = comic_service or ComicService(self.settings)
+        self.post_formatter = post_formatter or PostFormatter()
+        self.spacing = timedelta(hours=self.settings.MIN_HOURS_BETWEEN_POSTS)
+
+    def slot_for(self, dt: datetime) -> datetime:
+        """Floor a UTC datetime to the start of its posting slot"""
+        hours = (dt - EPOCH) // timedelta(hours=1)
+        spacing_hours = self.settings.MIN_HOURS_BETWEEN_POSTS
+        return EPOCH + timedelta(hours=hours - hours % spacing_hours)
+
+    @staticmethod
+    def slot_key(slot: datetime) -> str:
+        return slot.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def upcoming_slots(self, days: int, now: datetime = None):
+        """Slots from the current one through the next `days` days"""
+        slot = self.slot_for(now or datetime.utcnow())
+        end = slot + timedelta(days=days)
+        slots = []
+        while slot < end:
+            slots.append(slot)
+            slot += self.spacing
+        return slots
+
+    def get_current_entry(self, now: datetime = None):
+        """Return (slot_key, prepared entry or None) for the current slot"""
+        slot_key = self.slot_key(self.slot_for(now or datetime.utcnow()))
+        return slot_key, dynamodb.get_schedule_entry(slot_key)
+
+    def booked_strip_dates(self, now: datetime = None) -> set:
+        """Strips waiting in the upcoming calendar slots (one BatchGetItem)"""
+        slots = self.upcoming_slots(self.settings.SCHEDULE_DAYS_AHEAD, now)
+        entries = dynamodb.get_schedule_entries(self.slot_key(s) for s in slots)
+        return {
+            entry["strip_date"]
+            for entry in entries.values()
+            if not entry.get("posted") and not entry.get("deferred_to")
+        }
+
+    def claim_slot(self, slot_key: str) -> bool:
+        """Claim a slot unless a post went out less than one spacing ago"""
+        slot = datetime.strptime(slot_key, "%Y-%m-%dT%H:%M:%SZ")
+        return dynamodb.claim_post_slot(slot_key, self.slot_key(slot - self.spacing))
+
+    def release_slot(self, slot_key: str):
+        dynamodb.release_post_slot(slot_key)
+
+    def mark_posted(self, slot_key: str, post_uri: str):
+        dynamodb.mark_schedule_entry_posted(slot_key, post_uri)
+
+    def defer(self, entry: dict, retry_at: float) -> str:
+        """
+        Move a rate-limited post to the first slot starting at or after
+        retry_at. The original slot is marked deferred_to so it isn't posted
+        again; whatever the new slot held stays unposted and is rescheduled by
+        a later prepare run.
+        """
+        retry = datetime.utcfromtimestamp(retry_at)
+        slot = self.slot_for(retry)
+        if slot < retry:
+            slot += self.spacing
+        slot_key = self.slot_key(slot)
+        moved = {name: value for name, value in entry.items() if name != "pk"}
+        dynamodb.defer_schedule_entry(
+            {**moved, "slot_time": slot_key, "deferred_from": entry["slot_time"]},
+            entry["slot_time"],
+        )
+        logger.info(f"Deferred post from {entry['slot_time']} to {slot_key}")
+        return slot_key
+
+    def prepare(self, days: int = None, now: datetime = None) -> int:
+        """Fill every empty slot in the window; returns the number of new entries"""
+        days = days or self.settings.SCHEDULE_DAYS_AHEAD
+        slots = self.upcoming_slots(days, now)
+        existing = dynamodb.get_schedule_entries(self.slot_key(s) for s in slots)
+        scheduled = {entry["strip_date"] for entry in existing.values()}
+
+        candidates = [
+            strip_date
+            for strip_date in dynamodb.get_unposted_strip_dates()
+            if strip_date not in scheduled
+        ]
+        random.shuffle(candidates)
+
+        deadline = current_deadline()
+        prepared = 0
+        for slot in slots:
+            slot_key = self.slot_key(slot)
+            if slot_key in existing:
+                continue
+            if not deadline.has_time_for(self.settings.FETCH_STRIP_SECONDS):
+                # Filled slots are skipped next time, so they are the cursor
+                deadline.interrupted = True
+                logger.warning(f"Deadline near, stopping preparation at {slot_key}")
+                break
+
+            comic, anniversary = None, False
+            if (slot - self.spacing).date() != slot.date():  # first slot of the day
+                comic = self._anniversary_comic(slot, scheduled)
+                anniversary = comic is not None
+            if not comic:
+                comic = self._next_candidate(candidates, scheduled)
+            if not comic:
+                logger.warning(f"No strips left to schedule from {slot_key}")
+                break
+
+            body = self.post_formatter.render(
+                comic.date, comic.title, anniversary=anniversary
+            )
+            entry = {
+                "slot_time": slot_key,
+                "strip_date": comic.strip_date,
+                "title": comic.title,
+                "local_path": comic.local_path,
+                "text": body["text"],
+                "facets": body["facets"],
+                "anniversary": anniversary,
+                "posted": False,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            if dynamodb.save_schedule_entry(entry):
+                scheduled.add(comic.strip_date)
+                prepared += 1
+
+        logger.info(f"Prepared {prepared} scheduled posts over {days} days")
+        return prepared
+
+    def _next_candidate(self, candidates: list, scheduled: set):
+        while candidates:
+            strip_date = candidates.pop()
+            if strip_date in scheduled:  # taken since, e.g. as an anniversary
+                continue
+            item = dynamodb.get_comic_by_strip_date(
+                strip_date, attributes=dynamodb.POST_ATTRIBUTES
+            )
+            if item:
+                return Comic.from_item(item)
+        return None
+
+    def _anniversary_comic(self, slot: datetime, scheduled: set):
+        """Find (fetching if needed) an unposted strip from this month and day"""
+        dates = self.comic_service.get_anniversary_dates(slot.date())
+        random.shuffle(dates)
+        for strip_day in dates:
+            fetch_datetime = datetime.combine(strip_day, datetime.min.time())
+            strip_date = fetch_datetime.isoformat()
+            if strip_date in scheduled:
+                continue
+            try:
+                item = dynamodb.get_comic_by_strip_date(strip_date)
+                if not item:
+                    comic_data = self.comic_service.fetch_calvin_and_hobbes(
+                        fetch_datetime
+                    )
+                    item = self.comic_service.save_comic(comic_data)
+                if not item.get("posted"):
+                    return Comic.from_item(item)
+            except Exception as e:
+                logger.error(f"Error preparing anniversary strip {strip_day}: {e}")
+        return None
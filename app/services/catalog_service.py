@@ -0,0 +1,251 @@
+import argparse
+import base64
+import gzip
+import io
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from decimal import Decimal
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+
+from boto3.dynamodb.types import Binary
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.services.image_index_service import ImageIndexService
+from app.services.storage_service import StorageService
+from app.utils.deadline import with_current_deadline
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FORMAT = "calvin-catalog"
+CATALOG_VERSION = 1
+SET_TAG = "$set"
+BINARY_TAG = "$binary"
+# How often a segment blocked on a full page queue checks for a stopped export
+QUEUE_POLL_SECONDS = 0.1
+
+
+def _sort_key(value):
+    return value.value if isinstance(value, Binary) else value
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        # Tagged so import restores a DynamoDB set rather than a list
+        return {SET_TAG: sorted(value, key=_sort_key)}
+    if isinstance(value, (Binary, bytes, bytearray)):
+        return {BINARY_TAG: base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _restore_tagged(obj: dict):
+    if len(obj) == 1 and SET_TAG in obj:
+        return set(obj[SET_TAG])
+    if len(obj) == 1 and BINARY_TAG in obj:
+        return Binary(base64.b64decode(obj[BINARY_TAG]))
+    return obj
+
+
+def read_catalog(stream: BinaryIO) -> Iterator[dict]:
+    """
+    Yield the records of a gzip-compressed JSON-lines catalog, with numbers
+    as int/Decimal and sets and binary values restored, ready to be written
+    back to DynamoDB
+    """
+    with gzip.open(stream, "rt", encoding="utf-8") as lines:
+        header = json.loads(next(lines))
+        if header.get("format") != CATALOG_FORMAT:
+            raise ValueError("Not a comic catalog file")
+        for line in lines:
+            yield json.loads(line, parse_float=Decimal, object_hook=_restore_tagged)
+
+
+class CatalogService:
+    """
+    Export and import the whole Comics table.
+
+    The catalog is gzip-compressed JSON lines: a header line followed by one
+    record per comic (strip_date, url, title, local_path, posted, timestamps,
+    plus any other attributes). It can live on local disk or in S3.
+    """
+
+    def __init__(
+        self,
+        settings: Settings = None,
+        storage_service: StorageService = None,
+        image_index: ImageIndexService = None,
+    ):
+        self.settings = settings or get_settings()
+        self.storage_service = storage_service or StorageService(self.settings)
+        self.image_index = image_index or ImageIndexService(self.settings)
+
+    def _scan_parallel(self, total_segments: int) -> Iterator[list]:
+        """
+        Yield pages from a parallel segmented scan as they arrive. Closing the
+        generator early, e.g. after a write error, stops the segment scans
+        instead of leaving them blocked on the queue.
+        """
+        pages = queue.Queue(maxsize=total_segments * 2)
+        done = object()
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=QUEUE_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment):
+            try:
+                for page in dynamodb.iter_comic_segment(segment, total_segments):
+                    if not put(page):
+                        return
+            finally:
+                put(done)
+
+        with ThreadPoolExecutor(max_workers=total_segments) as pool:
+            futures = [
+                pool.submit(with_current_deadline(scan_segment), segment)
+                for segment in range(total_segments)
+            ]
+            try:
+                finished = 0
+                while finished < total_segments:
+                    page = pages.get()
+                    if page is done:
+                        finished += 1
+                    else:
+                        yield page
+                for future in futures:
+                    future.result()  # surface scan errors
+            finally:
+                stop.set()
+                while not pages.empty():
+                    pages.get_nowait()
+
+    def export(self, destination: str, total_segments: int = 4) -> int:
+        """Write the full catalog to a local path or s3:// URI; returns the count"""
+        if destination.startswith("s3://"):
+            buffer = io.BytesIO()
+            count = self._write_catalog(buffer, total_segments)
+            s3_service = self.storage_service.s3_service
+            if not s3_service or not s3_service.save_content_to_file(
+                buffer.getvalue(), s3_service._get_object_key(destination)
+            ):
+                raise IOError(f"Failed to write catalog to {destination}")
+        else:
+            # Streamed straight to disk as the segments arrive
+            count = self._write_catalog(destination, total_segments)
+        logger.info(f"Exported {count} comics to {destination}")
+        return count
+
+    def _write_catalog(self, target: Union[str, BinaryIO], total_segments: int) -> int:
+        count = 0
+        with gzip.open(target, "wt", encoding="utf-8") as compressed:
+            header = {
+                "format": CATALOG_FORMAT,
+                "version": CATALOG_VERSION,
+                "table": dynamodb.TABLE_NAME,
+                "exported_at": datetime.utcnow().isoformat(),
+            }
+            compressed.write(json.dumps(header) + "\n")
+            with closing(self._scan_parallel(total_segments)) as pages:
+                for page in pages:
+                    for item in page:
+                        line = json.dumps(
+                            item, default=_json_default, ensure_ascii=False
+                        )
+                        compressed.write(line + "\n")
+                        count += 1
+        return count
+
+    def import_catalog(self, source: str) -> int:
+        """
+        Load every record of a catalog into the Comics table, then recount STATS
+        and re-register the records' image hashes in the duplicate index
+        """
+        hashes = {}
+
+        def records(stream):
+            for record in read_catalog(stream):
+                if record.get("image_hash"):
+                    hashes[record["strip_date"]] = record["image_hash"]
+                yield record
+
+        with self._open(source) as stream:
+            count = dynamodb.put_comics(records(stream))
+        # Bulk writes bypass the transactional counters, so recount once
+        dynamodb.rebuild_stats()
+        self.image_index.register_all(hashes)
+        logger.info(f"Imported {count} comics from {source}")
+        return count
+
+    def _open(self, source: str) -> BinaryIO:
+        if source.startswith("s3://"):
+            data = self.storage_service.get_file_content(source)
+            if data is None:
+                raise FileNotFoundError(f"Catalog not found: {source}")
+            return io.BytesIO(data)
+        return open(source, "rb")
+
+
+class CatalogIndex:
+    """Read-only, in-memory index over an exported catalog for offline tooling"""
+
+    def __init__(self, records: Iterator[dict]):
+        self._by_date: Dict[str, dict] = {
+            record["strip_date"]: record for record in records
+        }
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as f:
+            return cls(read_catalog(f))
+
+    def __len__(self):
+        return len(self._by_date)
+
+    def __iter__(self):
+        return iter(sorted(self._by_date.values(), key=lambda r: r["strip_date"]))
+
+    def get(self, strip_date: str) -> Optional[dict]:
+        return self._by_date.get(strip_date)
+
+    def unposted(self) -> list:
+        return [record for record in self if not record.get("posted")]
+
+    def by_year(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for strip_date in self._by_date:
+            year = int(strip_date[:4])
+            counts[year] = counts.get(year, 0) + 1
+        return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import the comic catalog")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("location", help="local path or s3:// URI (.jsonl.gz)")
+    parser.add_argument("--segments", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = CatalogService()
+    if args.command == "export":
+        catalog.export(args.location, total_segments=args.segments)
+    else:
+        catalog.import_catalog(args.location)
+
+
+if __name__ == "__main__":
+    main()
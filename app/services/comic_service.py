@@ -1,22 +1,51 @@
 import logging
 import random
 from datetime import date, datetime, timedelta
-from tempfile import NamedTemporaryFile
+from typing import Iterable, Optional
 
 import requests
 from bs4 import BeautifulSoup
 
+from app.config import Settings, get_settings
 from app.database import dynamodb
 from app.database.models import Comic
+from app.services.image_index_service import ImageIndexService
 from app.services.storage_service import StorageService
+from app.utils.call_accounting import instrument_session
+from app.utils.deadline import request_timeout
+from app.utils.image_hash import to_hex
 
 logger = logging.getLogger(__name__)
 
+IMAGE_PREFIX = "calvin_"
+
+
+def image_file_name(dt: date) -> str:
+    """Deterministic storage key for a strip's image"""
+    return f"{IMAGE_PREFIX}{dt.strftime('%Y%m%d')}.png"
+
+
+def strip_date_from_file_name(file_name: str) -> Optional[str]:
+    """Inverse of image_file_name: the strip_date key the image belongs to"""
+    try:
+        stamp = file_name.rsplit("/", 1)[-1][len(IMAGE_PREFIX) :].split(".")[0]
+        return datetime.strptime(stamp, "%Y%m%d").isoformat()
+    except ValueError:
+        return None
+
 
 class ComicService:
-    def __init__(self):
+    def __init__(
+        self,
+        settings: Settings = None,
+        storage_service: StorageService = None,
+        image_index: ImageIndexService = None,
+    ):
+        self.settings = settings or get_settings()
         self.base_url = "https://www.gocomics.com/calvinandhobbes"
-        self.storage_service = StorageService()
+        self.storage_service = storage_service or StorageService(self.settings)
+        self.image_index = image_index or ImageIndexService(self.settings)
+        self.session = instrument_session(requests.Session(), "gocomics")
         self.start_date = date(1985, 11, 18)  # First strip published
         self.end_date = date(1995, 12, 31)  # Last strip published
 
@@ -25,6 +54,18 @@ class ComicService:
         random_days = random.randint(0, total_days)  # nosec
         return self.start_date + timedelta(days=random_days)
 
+    def get_anniversary_dates(self, day: date):
+        """Return every strip date sharing day's month and day-of-month"""
+        dates = []
+        for year in range(self.start_date.year, self.end_date.year + 1):
+            try:
+                candidate = date(year, day.month, day.day)
+            except ValueError:  # Feb 29 outside leap years
+                continue
+            if self.start_date <= candidate <= self.end_date:
+                dates.append(candidate)
+        return dates
+
     def fetch_calvin_and_hobbes(self, dt: datetime = None):
         try:
             if not dt:
@@ -35,7 +76,9 @@ class ComicService:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"  # noqa
             }
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(
+                url, headers=headers, timeout=request_timeout(30)
+            )
             response.raise_for_status()
             soup = BeautifulSoup(response.text, "html.parser")
             comic_image = soup.find("picture", class_="item-comic-image")
@@ -61,34 +104,44 @@ class ComicService:
             logger.error(f"Error fetching comic for {dt}: {str(e)}")
             raise
 
-    def download_image(self, image_url: str, dt: datetime):
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"  # noqa
-            }
-            response = requests.get(image_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            with NamedTemporaryFile(delete=False, suffix=".png") as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
-            file_name = f"calvin_{dt.strftime('%Y%m%d')}.png"
-            storage_path, _ = self.storage_service.save_file(temp_path, file_name)
-            if storage_path:
-                logger.info(f"Saved image to storage: {storage_path}")
-                return storage_path
-            else:
-                raise Exception("Failed to save image to storage")
-        except Exception as e:
-            logger.error(f"Error downloading image: {str(e)}")
-            raise
+    def fetch_image(self, image_url: str) -> bytes:
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"  # noqa
+        }
+        response = self.session.get(
+            image_url, headers=headers, timeout=request_timeout(30)
+        )
+        response.raise_for_status()
+        return response.content
 
-    def get_random_unposted_comic(self):
+    def store_image(self, content: bytes, dt: datetime) -> str:
+        # Keyed by date, so a retried ingest overwrites rather than duplicates
+        storage_path = self.storage_service.save_content(content, image_file_name(dt))
+        if storage_path:
+            logger.info(f"Saved image to storage: {storage_path}")
+            return storage_path
+        else:
+            raise Exception("Failed to save image to storage")
+
+    def get_random_unposted_comic(self, exclude: Iterable[str] = ()):
+        """
+        Pick a random unposted comic outside exclude (e.g. strips booked in
+        upcoming calendar slots), loading only what posting needs
+        """
         try:
-            unposted = dynamodb.get_unposted_comics()
+            excluded = set(exclude)
+            unposted = [
+                strip_date
+                for strip_date in dynamodb.get_unposted_strip_dates()
+                if strip_date not in excluded
+            ]
             if not unposted:
                 logger.info("No unposted comics available")
                 return None
-            return random.choice(unposted)
+            item = dynamodb.get_comic_by_strip_date(
+                random.choice(unposted), attributes=dynamodb.POST_ATTRIBUTES
+            )
+            return Comic.from_item(item) if item else None
         except Exception as e:
             logger.error(f"Error getting random unposted comic: {str(e)}")
             raise
@@ -101,37 +154,72 @@ class ComicService:
             if existing:
                 logger.info(f"Comic for {comic_data['date']} already exists")
                 return existing
-            storage_path = self.download_image(
-                comic_data["image_url"], comic_data["date"]
-            )
+            content = self.fetch_image(comic_data["image_url"])
+            # Decode and hash once; broken, junk and rerun images stop here
+            image_hash = self.image_index.check(content)
+            storage_path = self.store_image(content, comic_data["date"])
             comic = Comic(
-                strip_date=comic_data["date"].isoformat(),
+                strip_date=strip_date_iso,
                 url=comic_data["image_url"],
                 title=comic_data["title"],
                 local_path=storage_path,
                 posted=False,
+                image_hash=to_hex(image_hash),
             )
             saved_item = dynamodb.save_comic(comic.to_item())
+            if saved_item is None:
+                # A concurrent or earlier ingest wrote the record first
+                logger.info(f"Comic for {comic_data['date']} was saved concurrently")
+                return dynamodb.get_comic_by_strip_date(strip_date_iso)
+            self.image_index.register(image_hash, strip_date_iso)
             logger.info(f"Successfully saved comic for {comic_data['date']}")
             return saved_item
         except Exception as e:
             logger.error(f"Error in save_comic: {str(e)}")
             raise
 
-    def mark_as_posted(self, comic_id: str):
+    def mark_as_posted(self, comic_id: str) -> bool:
+        """Mark a comic as posted; False if it already was"""
         try:
-            dynamodb.mark_as_posted(comic_id)
-            logger.info(f"Marked comic {comic_id} as posted")
-            return comic_id
+            marked = dynamodb.mark_as_posted(comic_id)
+            if marked:
+                logger.info(f"Marked comic {comic_id} as posted")
+            return marked
         except Exception as e:
             logger.error(f"Error marking comic as posted: {str(e)}")
             raise
 
-    def get_unposted_comic_count(self) -> int:
-        """Returns the count of unposted comics"""
+    def unmark_as_posted(self, comic_id: str):
         try:
-            unposted_comics = dynamodb.get_unposted_comics()
-            return len(unposted_comics) if unposted_comics else 0
+            dynamodb.unmark_as_posted(comic_id)
+            logger.info(f"Marked comic {comic_id} as unposted again")
         except Exception as e:
-            logger.error(f"Error getting unposted comic count: {str(e)}")
-            return 0
+            logger.error(f"Error unmarking comic as posted: {str(e)}")
+            raise
+
+    def get_stats(self) -> dict:
+        """
+        Backlog counters, per-year histogram and last fetch/post times from the
+        STATS item (one GetItem); the item is rebuilt by a scan if it was
+        never seeded.
+        """
+        item = dynamodb.get_stats()
+        return {
+            "total": int(item.get("total", 0)),
+            "unposted": int(item.get("unposted", 0)),
+            "posted": int(item.get("posted", 0)),
+            "by_year": {
+                int(name[len("year_") :]): int(value)
+                for name, value in sorted(item.items())
+                if name.startswith("year_")
+            },
+            "last_fetch_at": item.get("last_fetch_at"),
+            "last_post_at": item.get("last_post_at"),
+        }
+
+    def get_unposted_comic_count(self) -> int:
+        """
+        Returns the count of unposted comics. Errors propagate: a backlog that
+        can't be read must not look empty and trigger a full refill.
+        """
+        return self.get_stats()["unposted"]
@@ -0,0 +1,92 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Optional
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.utils import image_hash
+
+logger = logging.getLogger(__name__)
+
+JUNK_LABEL = "junk"
+
+
+class RejectedImage(Exception):
+    """Raised at ingest for images that are broken, junk or already stored"""
+
+
+class ImageIndexService:
+    """
+    Perceptual-hash index of every ingested strip image.
+
+    Hashes live in the state table as LSH buckets (HASH#<band>#<byte>), so a
+    lookup is one BatchGetItem followed by a few in-memory Hamming distance
+    checks. Placeholder images registered with mark_junk() are stored in the
+    same buckets under the "junk" label.
+    """
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or get_settings()
+
+    def check(self, content: bytes) -> int:
+        """Decode and hash image bytes, raising RejectedImage for unusable images"""
+        try:
+            image = image_hash.decode_image(content)
+        except Exception as e:
+            raise RejectedImage(f"Image could not be decoded: {str(e)}")
+        if image.width < self.settings.IMAGE_MIN_WIDTH:
+            raise RejectedImage(f"Image is only {image.width}px wide")
+        if image_hash.is_blank(image):
+            raise RejectedImage("Image is blank")
+
+        value = image_hash.dhash(image)
+        match = self.find_match(value)
+        if match == JUNK_LABEL:
+            raise RejectedImage("Image matches a known placeholder")
+        if match:
+            raise RejectedImage(f"Image duplicates the strip from {match}")
+        return value
+
+    def find_match(self, value: int) -> Optional[str]:
+        """Label of the closest indexed image within the duplicate distance"""
+        best, best_distance = None, self.settings.IMAGE_DUPLICATE_DISTANCE + 1
+        for entry in dynamodb.get_image_hash_entries(image_hash.bands(value)):
+            stored, label = entry.split("#", 1)
+            distance = image_hash.hamming_distance(value, int(stored, 16))
+            if distance < best_distance:
+                best, best_distance = label, distance
+        return best
+
+    def register(self, value: int, label: str):
+        """Index a hash under label (a strip_date, or JUNK_LABEL)"""
+        dynamodb.add_image_hash_entry(
+            image_hash.bands(value), f"{image_hash.to_hex(value)}#{label}"
+        )
+
+    def register_all(self, hashes: Dict[str, str]) -> int:
+        """
+        Index many stored hashes ({label: hex hash}) with one write per bucket,
+        e.g. to rebuild the index from restored comic records. Hashes from an
+        older, shorter scheme can't be compared and are skipped.
+        """
+        buckets = defaultdict(set)
+        registered = 0
+        for label, hex_hash in hashes.items():
+            if len(hex_hash) != len(image_hash.to_hex(0)):
+                continue
+            for bucket in image_hash.bands(int(hex_hash, 16)):
+                buckets[bucket].add(f"{hex_hash}#{label}")
+            registered += 1
+        dynamodb.add_image_hash_entries(buckets)
+        if registered < len(hashes):
+            logger.warning(
+                f"Skipped {len(hashes) - registered} image hashes from an older scheme"
+            )
+        return registered
+
+    def mark_junk(self, content: bytes) -> int:
+        """Index a placeholder image so future look-alikes are rejected"""
+        value = image_hash.dhash(image_hash.decode_image(content))
+        self.register(value, JUNK_LABEL)
+        logger.info(f"Registered placeholder hash {image_hash.to_hex(value)}")
+        return value
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(Exception):
+    """Raised when the PDS rate limit leaves no room for a call until retry_at"""
+
+    def __init__(self, message: str, retry_at: float):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class RateLimiter:
+    """
+    Client-side token bucket for one Bluesky account, driven by the
+    ratelimit-remaining/ratelimit-reset headers the PDS returns.
+
+    While plenty of budget is left every container just counts down locally.
+    Once the PDS reports fewer than RATE_LIMIT_SHARED_BELOW calls left, the
+    headers are published to the state table and each call first takes a
+    token from that shared counter, so concurrent containers cannot overrun
+    the limit between them.
+    """
+
+    def __init__(self, name: str, settings: Settings = None, clock=time.time):
+        self.name = name
+        self.settings = settings or get_settings()
+        self.clock = clock
+        self.remaining = None  # unknown until the first response
+        self.reset_at = 0
+        # upload_images and create_thread call in from several threads
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return (
+            self.remaining is not None
+            and self.remaining < self.settings.RATE_LIMIT_SHARED_BELOW
+        )
+
+    def acquire(self):
+        """Take one call from the budget, raising RateLimitedError if none is left"""
+        with self._lock:
+            now = self.clock()
+            if self.remaining is None or now >= self.reset_at:
+                return  # let the next response tell us where the window stands
+            if self.shared and not dynamodb.take_rate_limit_token(
+                self.name, int(now)
+            ):
+                self.remaining = 0
+            if self.remaining <= 0:
+                raise RateLimitedError(
+                    f"Bluesky rate limit reached for {self.name}", self.reset_at
+                )
+            self.remaining -= 1
+
+    def update(self, response):
+        """Record the rate limit reported by a PDS response"""
+        remaining = response.headers.get("ratelimit-remaining")
+        reset = response.headers.get("ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), int(reset)
+        except ValueError:
+            return
+        if response.status_code == 429:
+            remaining = 0
+        with self._lock:
+            self.remaining, self.reset_at = remaining, reset
+            if not self.shared:
+                return
+        logger.info(f"Bluesky rate limit low: {remaining} calls until {reset}")
+        dynamodb.save_rate_limit(self.name, remaining, reset)
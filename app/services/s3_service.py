@@ -1,30 +1,42 @@
 import os
-from typing import Optional
+from typing import Iterator, List, Optional
 
 import boto3
 import magic
 from botocore.exceptions import ClientError
 
+from app.utils.call_accounting import instrument_boto3_client
+from app.utils.deadline import guard_boto3_client
+
 
 class S3Service:
     def __init__(
         self,
         bucket_name: str,
         region_name: str = None,
+        s3_client=None,
+        debug: bool = False,
+        client_config=None,
     ):
         self.bucket_name = bucket_name
         self.region_name = region_name or "us-east-1"
 
         # Let boto3 use IAM role by not providing credentials
-        self.s3_client = boto3.client("s3", region_name=self.region_name)
+        self.s3_client = guard_boto3_client(
+            s3_client
+            or instrument_boto3_client(
+                boto3.client("s3", region_name=self.region_name, config=client_config)
+            )
+        )
 
-        # Debug IAM role
-        try:
-            sts = boto3.client("sts")
-            identity = sts.get_caller_identity()
-            print(f"Using IAM identity: {identity['Arn']}")
-        except Exception as e:
-            print(f"Error getting IAM identity: {e}")
+        # Debug IAM role (an extra STS round trip, so only in debug mode)
+        if debug:
+            try:
+                sts = instrument_boto3_client(boto3.client("sts"))
+                identity = sts.get_caller_identity()
+                print(f"Using IAM identity: {identity['Arn']}")
+            except Exception as e:
+                print(f"Error getting IAM identity: {e}")
 
     def _get_object_key(self, object_name: str) -> str:
         """Extract the object key from a full path or S3 URI"""
@@ -66,32 +78,28 @@ class S3Service:
                     ContentType=content_type,
                     CacheControl="max-age=31536000",  # 1 year cache
                 )
-
-            # Verify upload
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=object_name)
-                print(f"✓ Verified file exists in S3: {object_name}")
-                return True
-            except ClientError:
-                print(f"✗ File upload verification failed for: {object_name}")
-                return False
+            # put_object raises on failure, so no HEAD round trip to verify it
+            return True
 
         except ClientError as e:
             print(f"Error uploading file to S3: {e}")
             return False
 
-    def get_file_url(self, object_name: str, expires_in: int = 3600) -> str:
+    def get_file_url(
+        self, object_name: str, expires_in: int = 3600, check_exists: bool = True
+    ) -> str:
         """Get a pre-signed URL for a file in S3"""
         try:
             object_key = self._get_object_key(object_name)
             print(f"Generating URL for {self.bucket_name}/{object_key}")
 
-            # First verify the object exists
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=object_key)
-            except ClientError:
-                print(f"✗ File does not exist in S3: {object_key}")
-                return None
+            # First verify the object exists, unless the caller just wrote it
+            if check_exists:
+                try:
+                    self.s3_client.head_object(Bucket=self.bucket_name, Key=object_key)
+                except ClientError:
+                    print(f"✗ File does not exist in S3: {object_key}")
+                    return None
 
             # Generate a URL that's valid for 1 hour by default
             url = self.s3_client.generate_presigned_url(
@@ -133,21 +141,36 @@ class S3Service:
             object_key = self._get_object_key(object_name)
             print(f"Deleting {self.bucket_name}/{object_key}")
 
+            # delete_object raises on failure, so no HEAD round trip to verify it
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_key)
-
-            # Verify deletion
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=object_key)
-                print(f"✗ File still exists after deletion: {object_key}")
-                return False
-            except ClientError:
-                print(f"✓ Verified file deletion: {object_key}")
-                return True
+            return True
 
         except ClientError as e:
             print(f"Error deleting file from S3: {e}")
             return False
 
+    def delete_files(self, object_names: List[str]) -> List[str]:
+        """Delete many files with DeleteObjects; returns the keys that failed"""
+        keys = [self._get_object_key(name) for name in object_names]
+        failed = []
+        for start in range(0, len(keys), 1000):
+            batch = keys[start : start + 1000]
+            print(f"Deleting {len(batch)} objects from {self.bucket_name}")
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            for error in response.get("Errors", []):
+                print(f"Error deleting {error['Key']}: {error.get('Message')}")
+                failed.append(error["Key"])
+        return failed
+
+    def list_files(self, prefix: str = "") -> Iterator[dict]:
+        """Yield {"Key", "LastModified", ...} for every object under a prefix"""
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            yield from page.get("Contents", [])
+
     def get_permanent_file_url(self, object_name: str) -> str:
         """Get the permanent S3 URL (for database storage)"""
         return f"s3://{self.bucket_name}/{object_name}"
@@ -1,36 +1,77 @@
 import logging
-import random
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from app.config import get_settings
-from app.services.bluesky_service import BlueskyService
+from app.config import Settings, get_settings
+from app.database import dynamodb, streams
+from app.database.models import Comic
+from app.services.bluesky_service import MAX_IMAGES_PER_POST, BlueskyService
+from app.services.calendar_service import CalendarService
 from app.services.comic_service import ComicService
-from app.utils.post_formatter import PostFormatter
+from app.services.rate_limiter import RateLimitedError
+from app.utils.deadline import current_deadline
+from app.utils.post_formatter import PostFormatter, facets_from_item, hashtag_facets
 
 logger = logging.getLogger(__name__)
 
+FETCH_CURSOR = "fetch_comics"
+
 
 class SchedulerService:
-    def __init__(self):
-        self.comic_service = ComicService()
-        self.bluesky_service = BlueskyService()
-        self.post_formatter = PostFormatter()
-        self.settings = get_settings()
-
-    def fetch_new_comics(self, count: int = 5):
-        """Fetch new comics only if there are no unposted comics available"""
+    def __init__(
+        self,
+        settings: Settings = None,
+        comic_service: ComicService = None,
+        bluesky_service: BlueskyService = None,
+        calendar_service: CalendarService = None,
+        post_formatter: PostFormatter = None,
+    ):
+        self.settings = settings or get_settings()
+        self.comic_service = comic_service or ComicService(self.settings)
+        self.bluesky_service = bluesky_service or BlueskyService(self.settings)
+        self.calendar_service = calendar_service or CalendarService(
+            self.comic_service, self.settings
+        )
+        self.post_formatter = post_formatter or PostFormatter()
+
+    def fetch_new_comics(self, count: int = None):
+        """
+        Top the backlog up to the high-water mark once it drops below the
+        low-water mark; count optionally caps how many strips one call fetches.
+        A run cut short by the invocation deadline saves how many strips are
+        still owed, and the next run resumes from that cursor.
+        """
+        deadline = current_deadline()
         try:
-            unposted_comics = self.comic_service.get_unposted_comic_count()
-            if unposted_comics > 0:
+            cursor = dynamodb.get_cursor(FETCH_CURSOR)
+            if cursor:
+                needed = int(cursor["remaining"])
+                logger.info(f"Resuming interrupted fetch: {needed} comics owed")
+            else:
+                unposted_comics = self.comic_service.get_unposted_comic_count()
+                if unposted_comics >= self.settings.BACKLOG_LOW_WATER_MARK:
+                    logger.info(
+                        f"Skipping fetch: {unposted_comics} unposted comics available."
+                    )
+                    return 0
+
+                needed = self.settings.BACKLOG_HIGH_WATER_MARK - unposted_comics
                 logger.info(
-                    f"Skipping fetch: {unposted_comics} unposted comics available."
+                    f"{unposted_comics} unposted comics left, fetching {needed} more..."
                 )
-                return 0
-
-            logger.info("No unposted comics found, fetching new comics...")
+            owed = needed
+            if count is not None:
+                needed = min(needed, count)
 
             comics_fetched = 0
-            for _ in range(count):
+            for attempt in range(needed):
+                if not deadline.has_time_for(self.settings.FETCH_STRIP_SECONDS):
+                    # Stop between strips so no S3 object is left without a record
+                    dynamodb.save_cursor(FETCH_CURSOR, remaining=needed - attempt)
+                    deadline.interrupted = True
+                    logger.warning(
+                        f"Deadline near, {needed - attempt} comics left for next run"
+                    )
+                    break
                 try:
                     random_date = self.comic_service.get_random_date()
                     fetch_datetime = datetime.combine(random_date, datetime.min.time())
@@ -45,6 +86,12 @@ class SchedulerService:
                 except Exception as e:
                     logger.error(f"Error fetching comic for {random_date}: {str(e)}")
                     continue
+            else:
+                if cursor and owed > needed:
+                    # Capped by count: the rest stays owed to the next run
+                    dynamodb.save_cursor(FETCH_CURSOR, remaining=owed - needed)
+                elif cursor:
+                    dynamodb.clear_cursor(FETCH_CURSOR)
 
             logger.info(f"Fetched {comics_fetched} new comics.")
             return comics_fetched
@@ -53,50 +100,166 @@ class SchedulerService:
             logger.error(f"Error in fetch_new_comics: {str(e)}")
             return 0
 
+    def get_status(self) -> dict:
+        """Backlog health from the STATS item, with the refill thresholds"""
+        stats = self.comic_service.get_stats()
+        return {
+            **stats,
+            "low_water_mark": self.settings.BACKLOG_LOW_WATER_MARK,
+            "high_water_mark": self.settings.BACKLOG_HIGH_WATER_MARK,
+            "needs_refill": stats["unposted"] < self.settings.BACKLOG_LOW_WATER_MARK,
+        }
+
+    def prepare_schedule(self, days: int = None) -> int:
+        """Precompute posts for the upcoming calendar slots"""
+        return self.calendar_service.prepare(days)
+
     def create_post(self):
-        """Create a new post with a random unposted comic"""
+        """
+        Publish the current calendar slot, falling back to a random comic that
+        isn't booked in an upcoming slot. The comic is marked as posted before
+        publishing, so a strip that is already out is never published twice;
+        the mark is undone if publishing fails.
+        """
+        slot_key, entry, claimed, marked = None, None, False, None
         try:
-            comic = self.comic_service.get_random_unposted_comic()
-
-            if not comic:
-                logger.warning(
-                    "No unposted comics available. Attempting to fetch new comics..."
-                )
-                fetched_count = self.fetch_new_comics(count=5)  # Fetch new comics
-                if fetched_count == 0:
-                    logger.error("Fetching comics failed or no new comics found.")
-                    return None  # Stop if no comics were fetched
+            slot_key, entry = self.calendar_service.get_current_entry()
+            if entry and entry.get("posted"):
+                logger.info(f"Slot {slot_key} has already been posted")
+                return None
+            if entry and entry.get("deferred_to"):
+                logger.info(f"Slot {slot_key} was deferred to {entry['deferred_to']}")
+                return None
 
-                # Try again after fetching
-                comic = self.comic_service.get_random_unposted_comic()
+            if entry:
+                comic = Comic.from_item(entry)
+                body = {
+                    "text": entry["text"],
+                    "facets": facets_from_item(entry.get("facets")),
+                }
+            else:
+                logger.info(f"No prepared post for slot {slot_key}, picking at random")
+                comic = self._get_random_comic()
                 if not comic:
-                    logger.error("Still no unposted comics after fetching. Exiting.")
                     return None
+                body = self.post_formatter.render(comic.date, comic.title)
 
-            captions = self.post_formatter.create_random_captions()
-            post_text = f"{random.choice(captions)}\n\n"
-
-            try:
-                comic_date = datetime.strptime(comic["strip_date"], "%Y-%m-%d").date()
-            except ValueError:
-                comic_date = datetime.fromisoformat(comic["strip_date"]).date()
+            if not self.calendar_service.claim_slot(slot_key):
+                logger.info(
+                    "Skipping post: less than "
+                    f"{self.settings.MIN_HOURS_BETWEEN_POSTS} hours since the last one"
+                )
+                return None
+            claimed = True
 
-            post_text += self.post_formatter.create_post_text(
-                comic_date, comic["title"]
-            )
+            if not self.comic_service.mark_as_posted(comic.strip_date):
+                logger.warning(f"Comic from {comic.strip_date} was already posted")
+                return None
+            marked = comic.strip_date
 
-            logger.info(f"Creating post with comic from {comic['strip_date']}")
+            logger.info(f"Creating post with comic from {comic.strip_date}")
 
-            result = self.bluesky_service.create_post(post_text, comic["local_path"])
+            result = self.bluesky_service.create_post(
+                body["text"], comic.local_path, facets=body["facets"]
+            )
 
             if result:
-                self.comic_service.mark_as_posted(comic["strip_date"])
-                logger.info(f"Successfully posted comic from {comic['strip_date']}")
+                claimed, marked = False, None
+                if entry:
+                    self.calendar_service.mark_posted(slot_key, result.get("uri", ""))
+                logger.info(f"Successfully posted comic from {comic.strip_date}")
                 return result
             else:
                 logger.error("Bluesky post creation returned None")
                 return None
 
+        except RateLimitedError as e:
+            logger.warning(f"Post deferred: {str(e)}")
+            if entry:
+                self.calendar_service.defer(entry, e.retry_at)
+            return None
         except Exception as e:
             logger.error(f"Error in create_post: {str(e)}")
             return None
+        finally:
+            if marked:
+                self.comic_service.unmark_as_posted(marked)
+            if claimed:
+                self.calendar_service.release_slot(slot_key)
+
+    def post_story_arc(self, start_date: date, days: int):
+        """
+        Post consecutive strips as one thread of up to four images per post.
+        Strips missing from the catalog are fetched first; each strip is marked
+        as posted as soon as the post carrying it is published.
+        """
+        strip_dates = [
+            datetime.combine(start_date + timedelta(days=i), datetime.min.time())
+            for i in range(days)
+        ]
+        items = dynamodb.get_comics_by_strip_dates(
+            [dt.isoformat() for dt in strip_dates], attributes=dynamodb.POST_ATTRIBUTES
+        )
+
+        comics = []
+        for dt in strip_dates:
+            item = items.get(dt.isoformat())
+            if not item:
+                try:
+                    item = self.comic_service.save_comic(
+                        self.comic_service.fetch_calvin_and_hobbes(dt)
+                    )
+                except Exception as e:
+                    logger.error(f"Skipping {dt.date()} in story arc: {str(e)}")
+                    continue
+            comics.append(Comic.from_item(item))
+
+        if not comics:
+            logger.error("No strips available for the requested story arc")
+            return None
+
+        chunks = [
+            comics[i : i + MAX_IMAGES_PER_POST]
+            for i in range(0, len(comics), MAX_IMAGES_PER_POST)
+        ]
+        posts = []
+        for part, chunk in enumerate(chunks, start=1):
+            text = self.post_formatter.create_arc_post_text(
+                chunk[0].date, chunk[-1].date, part, len(chunks)
+            )
+            posts.append(
+                {
+                    "text": text,
+                    "facets": hashtag_facets(text),
+                    "image_paths": [comic.local_path for comic in chunk],
+                    "alt_texts": [comic.title for comic in chunk],
+                }
+            )
+
+        def mark_chunk_posted(index, result):
+            for comic in chunks[index]:
+                self.comic_service.mark_as_posted(comic.strip_date)
+
+        results = self.bluesky_service.create_thread(posts, on_posted=mark_chunk_posted)
+        logger.info(f"Posted story arc of {len(comics)} strips in {len(results)} posts")
+        return results
+
+    def handle_stream_records(self, records: list) -> int:
+        """
+        Consume Comics table stream records and refill the backlog when posts
+        have drained it. Batches without a posted transition cost nothing.
+        """
+        posted = sum(1 for record in records if streams.is_posted_transition(record))
+        if not posted:
+            return 0
+        logger.info(f"{posted} comics posted, checking backlog")
+        return self.fetch_new_comics()
+
+    def _get_random_comic(self):
+        """Pick a random unposted comic; refills happen off the posting path"""
+        comic = self.comic_service.get_random_unposted_comic(
+            exclude=self.calendar_service.booked_strip_dates()
+        )
+        if not comic:
+            logger.error("No unposted comics available, waiting for a refill.")
+        return comic
@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+from app.config import Settings, get_settings
+from app.utils.call_accounting import instrument_boto3_client
+
+logger = logging.getLogger(__name__)
+
+
+class EnvParameterStore:
+    """Parameter-store stand-in backed by environment variables"""
+
+    def get_parameter(self, name: str) -> Optional[str]:
+        return os.environ.get(name)
+
+
+class SSMParameterStore:
+    """SSM Parameter Store; the client is only created on first use"""
+
+    def __init__(self, prefix: str, region_name: str = None):
+        self.prefix = prefix
+        self.region_name = region_name
+        self._client = None
+
+    def get_parameter(self, name: str) -> Optional[str]:
+        if self._client is None:
+            self._client = instrument_boto3_client(
+                boto3.client("ssm", region_name=self.region_name)
+            )
+        try:
+            response = self._client.get_parameter(
+                Name=f"{self.prefix}{name}", WithDecryption=True
+            )
+            return response["Parameter"]["Value"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ParameterNotFound":
+                return None
+            raise
+
+
+class SecretService:
+    """
+    Lazily fetched, TTL-cached secrets.
+    Nothing is read until a secret is first needed, and each value is reused
+    for SECRETS_TTL_SECONDS so rotated secrets are picked up without a redeploy.
+    """
+
+    def __init__(self, settings: Settings = None, store=None, clock=time.monotonic):
+        self.settings = settings or get_settings()
+        if store is None:
+            store = (
+                SSMParameterStore(
+                    self.settings.SECRETS_PARAMETER_PREFIX, self.settings.AWS_REGION
+                )
+                if self.settings.SECRETS_PARAMETER_PREFIX
+                else EnvParameterStore()
+            )
+        self.store = store
+        self.ttl = self.settings.SECRETS_TTL_SECONDS
+        self._clock = clock
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> str:
+        """Return a secret, or an empty string if it isn't configured"""
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[1] > self._clock():
+                return cached[0]
+            value = self.store.get_parameter(name) or ""
+            if not value:
+                logger.warning(f"Secret {name} is not configured")
+            self._cache[name] = (value, self._clock() + self.ttl)
+            return value
+
+    def invalidate(self, name: str = None):
+        """Drop one cached secret (or all), e.g. after an auth failure"""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(name, None)
@@ -2,18 +2,21 @@ import os
 from pathlib import Path
 from typing import Optional, Tuple
 
-from ..config import get_settings
+from ..config import Settings, get_settings
+from ..utils.deadline import boto3_config
 from .s3_service import S3Service
 
 
 class StorageService:
-    def __init__(self):
-        self.settings = get_settings()
-        self.s3_service = None
-        if self.settings.USE_S3_STORAGE:
+    def __init__(self, settings: Settings = None, s3_service: S3Service = None):
+        self.settings = settings or get_settings()
+        self.s3_service = s3_service
+        if self.settings.USE_S3_STORAGE and not self.s3_service:
             self.s3_service = S3Service(
                 bucket_name=self.settings.S3_BUCKET_NAME,
                 region_name=self.settings.AWS_REGION,
+                debug=self.settings.DEBUG,
+                client_config=boto3_config(self.settings.DEADLINE_RESERVE_MS),
             )
 
     def save_file(
@@ -31,7 +34,9 @@ class StorageService:
             success = self.s3_service.upload_file(file_path, destination_path)
             if success:
                 storage_path = self.s3_service.get_permanent_file_url(destination_path)
-                access_url = self.s3_service.get_file_url(destination_path)
+                access_url = self.s3_service.get_file_url(
+                    destination_path, check_exists=False
+                )
                 return storage_path, access_url
             return None, None
         else:
@@ -45,6 +50,21 @@ class StorageService:
 
             return str(local_path), str(local_path)
 
+    def save_content(self, content: bytes, destination_path: str) -> Optional[str]:
+        """
+        Save bytes to either S3 or local storage without a temporary file.
+        Returns the storage path, or None if the save failed.
+        """
+        if self.settings.USE_S3_STORAGE:
+            if self.s3_service.save_content_to_file(content, destination_path):
+                return self.s3_service.get_permanent_file_url(destination_path)
+            return None
+        else:
+            local_path = Path("comic_images") / destination_path
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            local_path.write_bytes(content)
+            return str(local_path)
+
     def get_file_content(self, storage_path: str) -> Optional[bytes]:
         """Get file content from storage"""
         if self.settings.USE_S3_STORAGE and storage_path.startswith("s3://"):
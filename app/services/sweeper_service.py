@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.services.comic_service import IMAGE_PREFIX, strip_date_from_file_name
+from app.services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+
+class SweeperService:
+    """
+    Reconciles stored strip images against Comics records.
+
+    An ingest uploads the image first and writes the record second, so a
+    failure in between leaves an orphaned object. Objects younger than the
+    grace period are skipped because their record may still be on its way.
+    """
+
+    def __init__(
+        self, settings: Settings = None, storage_service: StorageService = None
+    ):
+        self.settings = settings or get_settings()
+        self.storage_service = storage_service or StorageService(self.settings)
+
+    def sweep(self, grace_minutes: int = 60, dry_run: bool = False) -> dict:
+        """
+        Delete orphaned images in bulk and report records whose image is gone.
+        Returns counts of objects checked, orphans found/deleted and records
+        missing their image.
+        """
+        s3_service = self.storage_service.s3_service
+        if not s3_service:
+            logger.info("Sweeper only applies to S3 storage, nothing to do")
+            return {"checked": 0, "orphans": 0, "deleted": 0, "missing_images": 0}
+
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=grace_minutes)
+        objects = set()
+        recent = set()
+        for obj in s3_service.list_files(IMAGE_PREFIX):
+            if not strip_date_from_file_name(obj["Key"]):
+                continue
+            if obj["LastModified"] > cutoff:
+                recent.add(obj["Key"])
+            else:
+                objects.add(obj["Key"])
+
+        # Whatever form a record's strip_date takes, its local_path names the
+        # object it uses, so only objects no record references are orphans
+        referenced, missing_images = self._referenced_keys(objects | recent, s3_service)
+        orphans = sorted(objects - referenced)
+
+        deleted = 0
+        if orphans and not dry_run:
+            failed = s3_service.delete_files(orphans)
+            deleted = len(orphans) - len(failed)
+        logger.info(
+            f"Checked {len(objects)} images: {len(orphans)} orphans, {deleted} deleted"
+        )
+
+        return {
+            "checked": len(objects),
+            "orphans": len(orphans),
+            "deleted": deleted,
+            "missing_images": len(missing_images),
+        }
+
+    def _referenced_keys(self, stored_keys: set, s3_service):
+        """
+        One projected scan: the S3 keys records point at, and the records whose
+        image no longer exists (reported only).
+        """
+        prefix = s3_service.get_permanent_file_url("")
+        referenced = set()
+        missing = []
+        for item in dynamodb.iter_comics(attributes=("strip_date", "local_path")):
+            local_path = item.get("local_path") or ""
+            if not local_path.startswith(prefix):
+                continue
+            key = local_path[len(prefix) :]
+            referenced.add(key)
+            if key not in stored_keys:
+                missing.append(item["strip_date"])
+        if missing:
+            logger.warning(f"{len(missing)} comics have no stored image: {missing}")
+        return referenced, missing
@@ -0,0 +1,113 @@
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class CallBudgetExceeded(AssertionError):
+    """Raised when an invocation made more network calls than its budget allows"""
+
+
+class CallCounter:
+    """Per-invocation tally of outbound network calls.
+
+    Counts are keyed by ``(service, operation)``, e.g. ``("dynamodb", "Scan")``
+    or ``("bluesky", "com.atproto.repo.createRecord")``.
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, service: str, operation: str):
+        with self._lock:
+            self._counts[(service, operation)] += 1
+
+    def reset(self):
+        """Clear all counts, called at the start of every invocation"""
+        with self._lock:
+            self._counts.clear()
+
+    def count(self, service: str, operation: Optional[str] = None) -> int:
+        """Return the number of calls made to a service or a single operation"""
+        with self._lock:
+            if operation is not None:
+                return self._counts[(service, operation)]
+            return sum(n for (svc, _), n in self._counts.items() if svc == service)
+
+    def by_service(self) -> Dict[str, int]:
+        with self._lock:
+            totals = Counter()
+            for (service, _), n in self._counts.items():
+                totals[service] += n
+            return dict(totals)
+
+    def by_operation(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{svc}.{op}": n for (svc, op), n in self._counts.items()}
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+    def assert_within(self, budget: Dict[str, int]):
+        """
+        Check counts against upper bounds.
+        Budget keys are either a service ("s3") or "service.Operation"
+        ("dynamodb.Scan"); services missing from the budget are unbounded.
+        """
+        violations = []
+        for key, limit in budget.items():
+            service, _, operation = key.partition(".")
+            actual = self.count(service, operation or None)
+            if actual > limit:
+                violations.append(f"{key}: {actual} calls (budget {limit})")
+        if violations:
+            raise CallBudgetExceeded(
+                "Call budget exceeded: "
+                + "; ".join(violations)
+                + f" -- recorded {self.by_operation()}"
+            )
+
+    def log_summary(self, label: str):
+        logger.info(f"{label} network calls: {self.by_operation()}")
+
+
+# Shared across every service in the container; handlers reset it per invocation
+call_counter = CallCounter()
+
+
+def instrument_boto3_client(client, counter: CallCounter = None):
+    """Count every API call made through a boto3 client (or resource.meta.client)"""
+    counter = counter or call_counter
+
+    def _count_call(model, **kwargs):
+        counter.record(model.service_model.service_name, model.name)
+
+    client.meta.events.register("before-call", _count_call)
+    return client
+
+
+def xrpc_operation(request) -> str:
+    """Name an XRPC request by its method NSID, e.g. com.atproto.repo.createRecord"""
+    return urlparse(request.url).path.rsplit("/", 1)[-1]
+
+
+def instrument_session(
+    session,
+    service: str,
+    operation_name: Callable = None,
+    counter: CallCounter = None,
+):
+    """Count every response received through a requests.Session"""
+    counter = counter or call_counter
+    operation_name = operation_name or (lambda request: request.method)
+
+    def _count_response(response, *args, **kwargs):
+        counter.record(service, operation_name(response.request))
+
+    session.hooks["response"].append(_count_response)
+    return session
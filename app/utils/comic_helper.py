@@ -4,7 +4,7 @@ import random
 from datetime import datetime, timedelta
 from typing import List
 
-from PIL import Image
+from app.utils.post_formatter import CAPTIONS, HASHTAGS, SUNDAY_CAPTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +13,6 @@ class ComicHelper:
     def __init__(self, image_dir: str = "comic_images"):
         self.image_dir = image_dir
 
-    def validate_image(self, image_path: str) -> bool:
-        """Validate if image exists and is a valid image file"""
-        try:
-            if not os.path.exists(image_path):
-                return False
-            Image.open(image_path).verify()
-            return True
-        except Exception as e:
-            logger.error(f"Image validation failed for {image_path}: {str(e)}")
-            return False
-
     def get_date_range(
         self, start_date: datetime, end_date: datetime
     ) -> List[datetime]:
@@ -52,42 +41,10 @@ class ComicHelper:
     @staticmethod
     def get_random_hashtags(count: int = 3) -> List[str]:
         """Get random hashtags for posts"""
-        hashtag_pool = [
-            "CalvinAndHobbes",
-            "Comics",
-            "Nostalgia",
-            "BillWatterson",
-            "Comics",
-            "CalvinHobbes",
-            "NewspaperComics",
-            "ComicStrip",
-            "Childhood",
-            "ClassicComics",
-            "Tiger",
-            "Imagination",
-            "Adventure",
-            "Philosophy",
-            "Wisdom",
-            "Creativity",
-        ]
-        return random.sample(hashtag_pool, min(count, len(hashtag_pool)))
+        return random.sample(HASHTAGS, min(count, len(HASHTAGS)))
 
     @staticmethod
     def create_caption(date: datetime, is_sunday: bool = False) -> str:
         """Create caption for comic post"""
-        base_captions = [
-            "Join Calvin and Hobbes on another adventure! 🌟",
-            "Time for some childhood nostalgia! 📚",
-            "What mischief will Calvin get into today? 🎨",
-            "Philosophy with Calvin and Hobbes! 🤔",
-            "Ready for some imagination and wonder? ✨",
-        ]
-
-        sunday_captions = [
-            "It's Sunday! Time for a special colored adventure! 🎨",
-            "Sunday means extra special Calvin and Hobbes! 🌈",
-            "Enjoy this Sunday's colorful journey! 🎪",
-        ]
-
-        caption_pool = sunday_captions if is_sunday else base_captions
+        caption_pool = SUNDAY_CAPTIONS if is_sunday else CAPTIONS
         return random.choice(caption_pool)  # nosec
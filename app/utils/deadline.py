@@ -0,0 +1,117 @@
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from botocore.config import Config
+
+# Longest wait botocore's standard retry mode makes before the first retry
+FIRST_RETRY_BACKOFF_SECONDS = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """Raised when there is no time left in the invocation for another call"""
+
+
+class Deadline:
+    """
+    Wall-clock budget for one invocation.
+
+    Built from the Lambda context, it shrinks per-request timeouts as the
+    invocation runs out of time and lets long loops stop cleanly. Loops that
+    stop early set `interrupted` so the handler can hand off the rest.
+    """
+
+    def __init__(self, expires_at: float = math.inf, clock=time.monotonic):
+        self.expires_at = expires_at
+        self.clock = clock
+        self.interrupted = False
+
+    @classmethod
+    def from_context(cls, context, reserve_ms: int = 0, clock=time.monotonic):
+        """Deadline ending reserve_ms before the Lambda timeout (none outside Lambda)"""
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if not get_remaining:
+            return cls(clock=clock)
+        return cls(clock() + (get_remaining() - reserve_ms) / 1000, clock=clock)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return self.expires_at - self.clock()
+
+    def has_time_for(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """A request timeout no longer than default and ending by the deadline"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Invocation deadline reached")
+        return min(default, remaining)
+
+
+_current = contextvars.ContextVar("deadline", default=Deadline())
+
+
+def current_deadline() -> Deadline:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """Make deadline the current one for every service call in this block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def request_timeout(default: float = 30) -> float:
+    """Per-request timeout for HTTP calls under the current deadline"""
+    return current_deadline().timeout(default)
+
+
+def with_current_deadline(fn):
+    """Carry the caller's deadline into a worker thread"""
+    deadline = current_deadline()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with deadline_scope(deadline):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def guard_boto3_client(client):
+    """Refuse to start AWS calls once the current deadline has passed"""
+
+    def _check_deadline(model, **kwargs):
+        if current_deadline().expired():
+            raise DeadlineExceeded(f"Invocation deadline reached before {model.name}")
+
+    client.meta.events.register("before-call", _check_deadline)
+    return client
+
+
+def boto3_config(reserve_ms: int) -> Config:
+    """
+    Client config for deadline-guarded clients. The guard only stops calls
+    from starting after the deadline, so connect and read timeouts, retries
+    and the backoff between them are sized for a call that starts just before
+    it to still end within reserve_ms. Calls get a retry only when the reserve
+    leaves room for one.
+    """
+    seconds = reserve_ms / 1000
+    attempts = 2 if seconds > 2 * FIRST_RETRY_BACKOFF_SECONDS else 1
+    per_attempt = (seconds - (attempts - 1) * FIRST_RETRY_BACKOFF_SECONDS) / attempts
+    return Config(
+        connect_timeout=per_attempt / 4,
+        read_timeout=per_attempt * 3 / 4,
+        retries={"mode": "standard", "total_max_attempts": attempts},
+    )
@@ -0,0 +1,63 @@
+"""
+Perceptual hashing for strip images.
+
+dhash() is a 256-bit difference hash. The image is area-averaged down to a
+grayscale grid of 33x8 for wide daily strips or 17x16 for squarer Sunday
+pages, so the panels keep their shape, and each bit records whether a pixel
+is brighter than its right neighbour. Re-encoded, rescaled or slightly cropped
+copies of a strip land within a couple dozen bits of each other, while
+different drawings on the same panel layout sit well above that. bands()
+splits a hash into byte-sized LSH buckets; two hashes within 31 bits of each
+other always share at least one bucket.
+"""
+
+import io
+
+from PIL import Image, ImageStat
+
+HASH_BITS = 256
+BAND_COUNT = HASH_BITS // 8
+
+
+def decode_image(content: bytes) -> Image.Image:
+    """Fully decode image bytes once, raising on truncated or corrupt data"""
+    image = Image.open(io.BytesIO(content))
+    image.load()
+    return image
+
+
+def _grid(image: Image.Image):
+    """Hash grid (columns, rows) closest to the image's aspect ratio"""
+    columns = 32 if image.width >= 2 * image.height else 16
+    return columns, HASH_BITS // columns
+
+
+def dhash(image: Image.Image) -> int:
+    columns, rows = _grid(image)
+    small = image.convert("L").resize((columns + 1, rows), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(rows):
+        offset = row * (columns + 1)
+        for col in range(offset, offset + columns):
+            value = (value << 1) | (pixels[col] < pixels[col + 1])
+    return value
+
+
+def is_blank(image: Image.Image, min_stddev: float = 4.0) -> bool:
+    """True for near-uniform images, e.g. an empty or solid placeholder"""
+    thumbnail = image.convert("L").resize((64, 64), Image.Resampling.BILINEAR)
+    return ImageStat.Stat(thumbnail).stddev[0] < min_stddev
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bands(value: int):
+    """The hash's LSH buckets as (band, byte) pairs"""
+    return [(band, (value >> (8 * band)) & 0xFF) for band in range(BAND_COUNT)]
+
+
+def to_hex(value: int) -> str:
+    return f"{value:0{HASH_BITS // 4}x}"
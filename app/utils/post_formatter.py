@@ -1,8 +1,167 @@
+import random
+import re
+import unicodedata
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Sequence
+
+# Bluesky counts post length in grapheme clusters
+MAX_POST_GRAPHEMES = 300
+
+CAPTIONS = (
+    "Time for some Calvin and Hobbes wisdom! 🐯",
+    "Starting the day with Calvin's adventures! 🌟",
+    "A dose of childhood nostalgia coming up! 📚",
+    "Philosophy with Calvin and Hobbes! 🤔",
+    "Time to explore with Calvin and his tiger friend! 🎨",
+    "Ready for some Calvin and Hobbes magic? ✨",
+    "Let's see what trouble Calvin's getting into today! 🌍",
+    "Another classic Calvin and Hobbes moment! 🌟",
+    "Time for imagination and adventure! 🚀",
+    "Join Calvin and Hobbes in today's exploration! 🗺️",
+)
+
+SUNDAY_CAPTIONS = (
+    "It's Sunday! Time for a special colored adventure! 🎨",
+    "Sunday means extra special Calvin and Hobbes! 🌈",
+    "Enjoy this Sunday's colorful journey! 🎪",
+)
+
+ANNIVERSARY_CAPTION = "On this day in {year}, Calvin and Hobbes ran this! 📅"
+
+HASHTAGS = (
+    "CalvinAndHobbes",
+    "Comics",
+    "Nostalgia",
+    "BillWatterson",
+    "CalvinHobbes",
+    "NewspaperComics",
+    "ComicStrip",
+    "Childhood",
+    "ClassicComics",
+    "Tiger",
+    "Imagination",
+    "Adventure",
+    "Philosophy",
+    "Wisdom",
+    "Creativity",
+)
+
+HASHTAG_LINE = "#CalvinAndHobbes #Comics #Nostalgia"
+CREDIT_LINE = "Original by Bill Watterson"
+
+_HASHTAG = re.compile(r"(?<![\w#])#([^\W\d_]\w*)")
+_ZWJ = "\u200d"
+
+
+def _joins_previous(char: str) -> bool:
+    """True for code points that extend the grapheme cluster before them"""
+    code = ord(char)
+    return (
+        unicodedata.category(char) in ("Mn", "Me")
+        or 0xFE00 <= code <= 0xFE0F  # variation selectors
+        or 0x1F3FB <= code <= 0x1F3FF  # skin tone modifiers
+        or 0xE0020 <= code <= 0xE007F  # emoji tag sequences
+    )
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return 0x1F1E6 <= ord(char) <= 0x1F1FF
+
+
+def graphemes(text: str) -> List[str]:
+    """
+    Split text into grapheme clusters: marks, modifiers and ZWJ sequences join
+    the character before them and regional indicators pair up into flags.
+    """
+    clusters = []
+    for char in text:
+        if clusters:
+            last = clusters[-1]
+            flag_pair = (
+                _is_regional_indicator(char)
+                and len(last) == 1
+                and _is_regional_indicator(last)
+            )
+            if _joins_previous(char) or char == _ZWJ or last[-1] == _ZWJ or flag_pair:
+                clusters[-1] += char
+                continue
+        clusters.append(char)
+    return clusters
+
+
+def grapheme_length(text: str) -> int:
+    return len(graphemes(text))
+
+
+def truncate(text: str, limit: int = MAX_POST_GRAPHEMES) -> str:
+    clusters = graphemes(text)
+    if len(clusters) <= limit:
+        return text
+    return "".join(clusters[: limit - 1]).rstrip() + "…"
+
+
+def hashtag_facets(text: str) -> List[dict]:
+    """app.bsky.richtext.facet#tag facets, indexed by UTF-8 byte offsets"""
+    facets = []
+    for match in _HASHTAG.finditer(text):
+        start = len(text[: match.start()].encode("utf-8"))
+        facets.append(
+            {
+                "index": {
+                    "byteStart": start,
+                    "byteEnd": start + len(match.group(0).encode("utf-8")),
+                },
+                "features": [
+                    {"$type": "app.bsky.richtext.facet#tag", "tag": match.group(1)}
+                ],
+            }
+        )
+    return facets
+
+
+def facets_from_item(facets: Optional[Sequence[dict]]) -> Optional[List[dict]]:
+    """Facets read back from DynamoDB, with Decimal offsets turned into ints"""
+    if not facets:
+        return None
+    return [
+        {
+            **facet,
+            "index": {name: int(value) for name, value in facet["index"].items()},
+        }
+        for facet in facets
+    ]
+
+
+class _Deck:
+    """Draw from a pool without repeats until every entry has been used"""
+
+    def __init__(self, pool: Sequence[str]):
+        self.pool = pool
+        self.remaining = []
+
+    def draw(self) -> str:
+        if not self.remaining:
+            self.remaining = list(self.pool)
+            random.shuffle(self.remaining)
+        return self.remaining.pop()
 
 
 class PostFormatter:
+    """
+    Post text templates.
+
+    Caption and hashtag pools are compiled once at import. Captions are dealt
+    from shuffled decks, so a batch of prepared posts doesn't repeat one until
+    the pool runs out. Sunday strips get Sunday captions and anniversary strips
+    an "on this day" caption. render() returns the text trimmed to Bluesky's
+    300-grapheme limit together with its hashtag facets, so the calendar can
+    store both and posting does no formatting at all.
+    """
+
+    def __init__(self):
+        self._captions = _Deck(CAPTIONS)
+        self._sunday_captions = _Deck(SUNDAY_CAPTIONS)
+
     @staticmethod
     def create_post_text(comic_date: datetime, title: Optional[str] = None) -> str:
         """Create post text with comic information"""
@@ -15,25 +174,49 @@ class PostFormatter:
         if title:
             lines.append(f"\n{title}")
 
-        lines.extend(
-            ["\n#CalvinAndHobbes #Comics #Nostalgia", "Original by Bill Watterson"]
-        )
+        lines.extend([f"\n{HASHTAG_LINE}", CREDIT_LINE])
 
         return "\n".join(lines)
 
     @staticmethod
     def create_random_captions() -> list:
         """Return a list of random Calvin and Hobbes related captions"""
-        captions = [
-            "Time for some Calvin and Hobbes wisdom! 🐯",
-            "Starting the day with Calvin's adventures! 🌟",
-            "A dose of childhood nostalgia coming up! 📚",
-            "Philosophy with Calvin and Hobbes! 🤔",
-            "Time to explore with Calvin and his tiger friend! 🎨",
-            "Ready for some Calvin and Hobbes magic? ✨",
-            "Let's see what trouble Calvin's getting into today! 🌍",
-            "Another classic Calvin and Hobbes moment! 🌟",
-            "Time for imagination and adventure! 🚀",
-            "Join Calvin and Hobbes in today's exploration! 🗺️",
-        ]
-        return captions
+        return list(CAPTIONS)
+
+    def caption_for(self, comic_date: datetime, anniversary=False) -> str:
+        if anniversary:
+            return ANNIVERSARY_CAPTION.format(year=comic_date.year)
+        if comic_date.weekday() == 6:
+            return self._sunday_captions.draw()
+        return self._captions.draw()
+
+    def render(
+        self, comic_date: datetime, title: Optional[str] = None, anniversary=False
+    ) -> dict:
+        """Complete post body as {"text", "facets"}, within the grapheme limit"""
+        caption = self.caption_for(comic_date, anniversary)
+        text = f"{caption}\n\n" + self.create_post_text(comic_date, title)
+        if grapheme_length(text) > MAX_POST_GRAPHEMES and title:
+            # Long titles go first; the date line already identifies the strip
+            text = f"{caption}\n\n" + self.create_post_text(comic_date)
+        text = truncate(text)
+        return {"text": text, "facets": hashtag_facets(text)}
+
+    @staticmethod
+    def create_arc_post_text(
+        start_date: datetime, end_date: datetime, part: int, parts: int
+    ) -> str:
+        """Create the text for one post of a multi-strip story arc thread"""
+        date_range = (
+            f"{start_date.strftime('%B %d')} – {end_date.strftime('%B %d, %Y')}"
+        )
+        if part == 1:
+            return "\n".join(
+                [
+                    f"🧵 A Calvin and Hobbes story arc, starting {date_range}",
+                    f"\n({part}/{parts})",
+                    f"\n{HASHTAG_LINE}",
+                    CREDIT_LINE,
+                ]
+            )
+        return f"📖 {date_range} ({part}/{parts})"
@@ -2,3 +2,95 @@ import os
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + "/.."))
+os.environ.setdefault("S3_BUCKET_NAME", "calvobit")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import json  # noqa: E402
+
+import boto3  # noqa: E402
+import pytest  # noqa: E402
+import requests  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+
+from app.utils.call_accounting import (  # noqa: E402
+    call_counter,
+    instrument_boto3_client,
+)
+
+
+@pytest.fixture
+def call_budget():
+    """
+    Reset the shared call counter and hand it to the test, which asserts upper
+    bounds with ``call_budget.assert_within({"dynamodb": 2, "s3.GetObject": 1})``
+    """
+    call_counter.reset()
+    yield call_counter
+    call_counter.reset()
+
+
+class FakePDSAdapter(BaseAdapter):
+    """
+    Answers XRPC calls locally, so session hooks still fire. A blob's ref is its
+    uploaded body; created records are kept and get numbered uri/cids.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.limited = []
+        self.headers = {}
+
+    def rate_limit(self, *methods, remaining="100", reset="4102444800"):
+        """Answer 429 to the given methods once each, in order"""
+        self.limited.extend(methods)
+        self.headers = {"ratelimit-remaining": remaining, "ratelimit-reset": reset}
+
+    def send(self, request, **kwargs):
+        method = request.url.rsplit("/", 1)[-1]
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers.update(self.headers)
+        if self.limited and self.limited[0] == method:
+            self.limited.pop(0)
+            response.status_code = 429
+            response._content = b'{"error": "RateLimitExceeded"}'
+            response.headers["ratelimit-remaining"] = "0"
+            return response
+
+        if method == "com.atproto.server.createSession":
+            payload = {"accessJwt": "jwt", "did": "did:plc:calvin"}
+        elif method == "com.atproto.repo.uploadBlob":
+            payload = {"blob": {"ref": request.body.decode(errors="replace")}}
+        else:
+            self.records.append(json.loads(request.body)["record"])
+            n = len(self.records)
+            payload = {"uri": f"at://did:plc:calvin/post/{n}", "cid": f"cid{n}"}
+        response.status_code = 200
+        response._content = json.dumps(payload).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pds():
+    return FakePDSAdapter()
+
+
+@pytest.fixture
+def s3_stub():
+    """Real, instrumented S3 client whose calls are answered by a Stubber"""
+    client = instrument_boto3_client(
+        boto3.client(
+            "s3",
+            region_name="us-east-1",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        )
+    )
+    with Stubber(client) as stubber:
+        yield stubber
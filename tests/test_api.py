@@ -0,0 +1,46 @@
+import time
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.api import create_app
+from app.config import Settings
+from app.container import Container
+
+
+def worker(**settings):
+    scheduler = MagicMock()
+    container = Container(Settings(**settings), scheduler=scheduler)
+    return TestClient(create_app(container)), scheduler
+
+
+def test_endpoints_run_the_shared_scheduler():
+    client, scheduler = worker(WORKER_SCHEDULER=False)
+    scheduler.fetch_new_comics.return_value = 3
+    scheduler.prepare_schedule.return_value = 2
+    scheduler.create_post.side_effect = [{"uri": "at://post/1"}, None]
+    scheduler.get_status.return_value = {"unposted": 4, "needs_refill": False}
+
+    with client:
+        assert client.post("/fetch", params={"count": 3}).json()["fetched"] == 3
+        assert client.post("/prepare", params={"days": 2}).json()["prepared"] == 2
+        assert client.post("/post").json()["postId"] == "at://post/1"
+        assert client.post("/post").status_code == 400
+        assert client.get("/status").json()["unposted"] == 4
+
+    scheduler.fetch_new_comics.assert_called_once_with(3)
+    scheduler.prepare_schedule.assert_called_once_with(2)
+
+
+def test_internal_scheduler_runs_jobs_for_the_app_lifetime():
+    client, scheduler = worker(WORKER_SCHEDULER=True)
+
+    with client:
+        for _ in range(100):
+            if scheduler.create_post.called and scheduler.fetch_new_comics.called:
+                break
+            time.sleep(0.01)
+
+    scheduler.fetch_new_comics.assert_called_once_with()
+    scheduler.prepare_schedule.assert_called_once_with()
+    scheduler.create_post.assert_called_once_with()
@@ -0,0 +1,73 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from botocore.stub import Stubber
+
+from app.database import dynamodb
+from app.database.streams import LocalStream, posted_record
+from app.services.scheduler_service import SchedulerService
+
+
+@patch("app.database.dynamodb.get_cursor", return_value=None)
+@patch("app.services.scheduler_service.CalendarService")
+@patch("app.services.scheduler_service.BlueskyService")
+@patch("app.services.scheduler_service.ComicService")
+class TestBacklogRefill(unittest.TestCase):
+    def test_posted_updates_refill_to_high_water_mark(self, MockComic, *_):
+        scheduler = SchedulerService()
+        comic_service = MockComic.return_value
+        comic_service.get_unposted_comic_count.return_value = 2
+        comic_service.get_random_date.return_value = date(1987, 11, 18)
+        stream = LocalStream(scheduler.handle_stream_records)
+        dynamodb.subscribe(stream.put)
+        try:
+            with Stubber(dynamodb.table.meta.client) as stub:
+                for _ in range(2):
+                    stub.add_response("transact_write_items", {})
+                dynamodb.mark_as_posted("1987-11-18T00:00:00")
+                dynamodb.mark_as_posted("1987-11-19T00:00:00")
+        finally:
+            dynamodb.unsubscribe(stream.put)
+
+        fetched = stream.flush()
+
+        self.assertEqual(fetched, 8)
+        self.assertEqual(comic_service.fetch_calvin_and_hobbes.call_count, 8)
+        comic_service.get_unposted_comic_count.assert_called_once()
+
+    def test_backlog_above_low_water_mark_is_left_alone(self, MockComic, *_):
+        scheduler = SchedulerService()
+        comic_service = MockComic.return_value
+        comic_service.get_unposted_comic_count.return_value = 5
+
+        self.assertEqual(
+            scheduler.handle_stream_records([posted_record("1990-01-01")]), 0
+        )
+        comic_service.fetch_calvin_and_hobbes.assert_not_called()
+
+    def test_unrelated_records_cost_nothing(self, MockComic, *_):
+        scheduler = SchedulerService()
+        comic_service = MockComic.return_value
+
+        fetched = scheduler.handle_stream_records(
+            [
+                {"eventName": "INSERT", "dynamodb": {}},
+                posted_record("1990-01-01", was_posted=True),
+            ]
+        )
+
+        self.assertEqual(fetched, 0)
+        comic_service.get_unposted_comic_count.assert_not_called()
+
+    def test_create_post_never_scrapes(self, MockComic, _, MockCalendar, _cursor):
+        scheduler = SchedulerService()
+        MockCalendar.return_value.get_current_entry.return_value = ("slot", None)
+        MockComic.return_value.get_random_unposted_comic.return_value = None
+
+        self.assertIsNone(scheduler.create_post())
+        MockComic.return_value.fetch_calvin_and_hobbes.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
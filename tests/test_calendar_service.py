@@ -0,0 +1,253 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from botocore.stub import Stubber
+
+from app.database import dynamodb
+from app.services.calendar_service import CalendarService
+from app.services.rate_limiter import RateLimitedError
+from app.services.scheduler_service import SchedulerService
+
+
+class InMemorySlots:
+    """The calendar's slice of the dynamodb module, backed by a dict"""
+
+    def __init__(self, entries):
+        self.entries = {entry["slot_time"]: dict(entry) for entry in entries}
+
+    def get_schedule_entry(self, slot_time):
+        return self.entries.get(slot_time)
+
+    def claim_post_slot(self, slot_time, earliest_previous):
+        return True
+
+    def release_post_slot(self, slot_time):
+        pass
+
+    def mark_schedule_entry_posted(self, slot_time, post_uri):
+        self.entries[slot_time].update(posted=True, post_uri=post_uri)
+
+    def get_schedule_entries(self, slot_times):
+        return {
+            slot_time: self.entries[slot_time]
+            for slot_time in slot_times
+            if slot_time in self.entries
+        }
+
+    def defer_schedule_entry(self, item, from_slot):
+        self.entries[item["slot_time"]] = dict(item)
+        self.entries[from_slot]["deferred_to"] = item["slot_time"]
+
+
+class TestCalendarService(unittest.TestCase):
+    def setUp(self):
+        self.comic_service = MagicMock()
+        self.calendar = CalendarService(comic_service=self.comic_service)
+
+    def test_slots_are_aligned_to_minimum_spacing(self):
+        slot = self.calendar.slot_for(datetime(2026, 10, 19, 15, 42))
+
+        self.assertEqual(slot, datetime(2026, 10, 19, 8, 0))
+        self.assertEqual(
+            len(self.calendar.upcoming_slots(2, now=datetime(2026, 10, 19, 15))), 6
+        )
+
+    @patch("app.services.calendar_service.dynamodb")
+    def test_claim_requires_previous_post_one_spacing_earlier(self, mock_db):
+        self.calendar.claim_slot("2026-10-19T16:00:00Z")
+
+        mock_db.claim_post_slot.assert_called_once_with(
+            "2026-10-19T16:00:00Z", "2026-10-19T08:00:00Z"
+        )
+
+    @patch("app.services.calendar_service.dynamodb")
+    def test_prepare_reserves_first_daily_slot_for_anniversary(self, mock_db):
+        mock_db.get_schedule_entries.return_value = {}
+        mock_db.get_unposted_strip_dates.return_value = ["1990-03-03", "1991-04-04"]
+        mock_db.get_comic_by_strip_date.side_effect = lambda strip_date, **kw: (
+            {"strip_date": strip_date, "title": "t", "local_path": "p"}
+        )
+        mock_db.save_schedule_entry.return_value = True
+        self.comic_service.get_anniversary_dates.return_value = [date(1986, 10, 20)]
+
+        prepared = self.calendar.prepare(days=1, now=datetime(2026, 10, 19, 17))
+
+        entries = [c.args[0] for c in mock_db.save_schedule_entry.call_args_list]
+        self.assertEqual(prepared, 3)
+        self.assertEqual(
+            [(e["slot_time"], e["anniversary"]) for e in entries],
+            [
+                ("2026-10-19T16:00:00Z", False),
+                ("2026-10-20T00:00:00Z", True),
+                ("2026-10-20T08:00:00Z", False),
+            ],
+        )
+        self.assertEqual(entries[1]["strip_date"], "1986-10-20T00:00:00")
+        self.assertIn("On this day in 1986", entries[1]["text"])
+
+    @patch("app.services.calendar_service.dynamodb")
+    def test_anniversary_strip_is_not_scheduled_again_from_backlog(self, mock_db):
+        mock_db.get_schedule_entries.return_value = {}
+        mock_db.get_unposted_strip_dates.return_value = ["1986-10-20T00:00:00"]
+        mock_db.get_comic_by_strip_date.side_effect = lambda strip_date, **kw: (
+            {"strip_date": strip_date, "title": "t", "local_path": "p"}
+        )
+        mock_db.save_schedule_entry.return_value = True
+        self.comic_service.get_anniversary_dates.return_value = [date(1986, 10, 20)]
+
+        prepared = self.calendar.prepare(days=1, now=datetime(2026, 10, 20, 1))
+
+        entries = [c.args[0] for c in mock_db.save_schedule_entry.call_args_list]
+        self.assertEqual(prepared, 1)
+        self.assertEqual(
+            [(e["slot_time"], e["strip_date"]) for e in entries],
+            [("2026-10-20T00:00:00Z", "1986-10-20T00:00:00")],
+        )
+
+    def test_rate_limited_post_moves_to_first_slot_after_reset(self):
+        retry_at = datetime(2026, 10, 19, 9, 30).replace(tzinfo=timezone.utc)
+        entry = {
+            "pk": "SLOT#2026-10-19T08:00:00Z",
+            "slot_time": "2026-10-19T08:00:00Z",
+            "strip_date": "1990-03-03",
+        }
+
+        with Stubber(dynamodb.state_table.meta.client) as stub:
+            stub.add_response(
+                "transact_write_items",
+                {},
+                {
+                    "TransactItems": [
+                        {
+                            "Put": {
+                                "TableName": dynamodb.STATE_TABLE_NAME,
+                                "Item": {
+                                    "pk": "SLOT#2026-10-19T16:00:00Z",
+                                    "slot_time": "2026-10-19T16:00:00Z",
+                                    "strip_date": "1990-03-03",
+                                    "deferred_from": "2026-10-19T08:00:00Z",
+                                },
+                            }
+                        },
+                        {
+                            "Update": {
+                                "TableName": dynamodb.STATE_TABLE_NAME,
+                                "Key": {"pk": "SLOT#2026-10-19T08:00:00Z"},
+                                "UpdateExpression": "SET deferred_to = :to",
+                                "ExpressionAttributeValues": {
+                                    ":to": "2026-10-19T16:00:00Z"
+                                },
+                            }
+                        },
+                    ]
+                },
+            )
+            slot_key = self.calendar.defer(entry, retry_at.timestamp())
+
+        self.assertEqual(slot_key, "2026-10-19T16:00:00Z")
+
+    def test_deferred_post_is_published_once_from_its_new_slot(self):
+        slots = InMemorySlots(
+            [
+                {
+                    "slot_time": "2026-10-19T08:00:00Z",
+                    "strip_date": "1990-03-03T00:00:00",
+                    "local_path": "s3://calvobit/calvin_19900303.png",
+                    "text": "Prepared text",
+                    "posted": False,
+                }
+            ]
+        )
+        retry_at = datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc).timestamp()
+        bluesky = MagicMock()
+        bluesky.create_post.side_effect = [
+            RateLimitedError("limited", retry_at),
+            {"uri": "at://post/1"},
+        ]
+        posted = set()
+
+        def mark_as_posted(strip_date):
+            if strip_date in posted:
+                return False
+            posted.add(strip_date)
+            return True
+
+        self.comic_service.mark_as_posted.side_effect = mark_as_posted
+        self.comic_service.unmark_as_posted.side_effect = posted.discard
+        scheduler = SchedulerService(
+            comic_service=self.comic_service,
+            bluesky_service=bluesky,
+            calendar_service=self.calendar,
+        )
+
+        with patch("app.services.calendar_service.dynamodb", slots):
+            for now in (
+                datetime(2026, 10, 19, 9),  # rate limited, deferred
+                datetime(2026, 10, 19, 10),  # limit cleared, same slot
+                datetime(2026, 10, 19, 16),  # the slot it was deferred to
+            ):
+                self.calendar.get_current_entry = (
+                    lambda now=now: CalendarService.get_current_entry(
+                        self.calendar, now
+                    )
+                )
+                scheduler.create_post()
+
+        self.assertEqual(bluesky.create_post.call_count, 2)
+        self.assertEqual(posted, {"1990-03-03T00:00:00"})
+        self.assertEqual(
+            slots.entries["2026-10-19T08:00:00Z"]["deferred_to"],
+            "2026-10-19T16:00:00Z",
+        )
+        self.assertTrue(slots.entries["2026-10-19T16:00:00Z"]["posted"])
+
+    def test_strip_already_posted_is_not_published_again(self):
+        slots = InMemorySlots(
+            [
+                {
+                    "slot_time": "2026-10-19T08:00:00Z",
+                    "strip_date": "1990-03-03T00:00:00",
+                    "text": "Prepared text",
+                    "posted": False,
+                }
+            ]
+        )
+        self.comic_service.mark_as_posted.return_value = False
+        bluesky = MagicMock()
+        scheduler = SchedulerService(
+            comic_service=self.comic_service,
+            bluesky_service=bluesky,
+            calendar_service=self.calendar,
+        )
+        self.calendar.get_current_entry = lambda: CalendarService.get_current_entry(
+            self.calendar, datetime(2026, 10, 19, 9)
+        )
+
+        with patch("app.services.calendar_service.dynamodb", slots):
+            self.assertIsNone(scheduler.create_post())
+
+        bluesky.create_post.assert_not_called()
+        self.comic_service.unmark_as_posted.assert_not_called()
+
+    def test_random_fallback_skips_strips_booked_in_upcoming_slots(self):
+        now = datetime.utcnow()
+        later = self.calendar.slot_key(self.calendar.slot_for(now) + timedelta(hours=8))
+        slots = InMemorySlots([{"slot_time": later, "strip_date": "1991-04-04"}])
+        self.comic_service.get_random_unposted_comic.return_value = None
+        scheduler = SchedulerService(
+            comic_service=self.comic_service,
+            bluesky_service=MagicMock(),
+            calendar_service=self.calendar,
+        )
+
+        with patch("app.services.calendar_service.dynamodb", slots):
+            self.assertIsNone(scheduler.create_post())
+
+        self.comic_service.get_random_unposted_comic.assert_called_once_with(
+            exclude={"1991-04-04"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+import io
+import random
+from datetime import datetime
+
+import pytest
+import requests
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from PIL import Image
+from requests.adapters import BaseAdapter
+
+from app.config import Settings, get_settings
+from app.container import Container
+from app.database import dynamodb
+from app.services.s3_service import S3Service
+from app.services.storage_service import StorageService
+from app.utils.call_accounting import CallBudgetExceeded, CallCounter
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\nfake-image"
+
+
+class FakeGoComicsAdapter(BaseAdapter):
+    """Serves a strip page for any date and a decodable image for its src"""
+
+    def __init__(self):
+        super().__init__()
+        buffer = io.BytesIO()
+        Image.linear_gradient("L").resize((600, 200)).save(buffer, format="PNG")
+        self.image = buffer.getvalue()
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        if request.url.endswith(".png"):
+            response._content = self.image
+        else:
+            response._content = (
+                b'<picture class="item-comic-image">'
+                b'<img src="https://assets.example.com/strip.png"></picture>'
+            )
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def container(s3_stub, pds):
+    settings = get_settings()
+    s3_service = S3Service(settings.S3_BUCKET_NAME, s3_client=s3_stub.client)
+    container = Container(
+        settings, storage_service=StorageService(settings, s3_service=s3_service)
+    )
+    container.bluesky_service.session.mount("https://", pds)
+    container.comic_service.session.mount("https://", FakeGoComicsAdapter())
+    return container
+
+
+@pytest.fixture
+def scheduler(container):
+    return container.scheduler
+
+
+def stub_image_download(s3_stub):
+    s3_stub.add_response(
+        "get_object",
+        {"Body": StreamingBody(io.BytesIO(PNG_BYTES), len(PNG_BYTES))},
+    )
+
+
+def comic_item():
+    # Fresh each time: boto3 deserializes stubbed responses in place
+    return {
+        "strip_date": {"S": "1987-11-18"},
+        "title": {"S": "Calvin and Hobbes - 1987-11-18"},
+        "local_path": {"S": "s3://calvobit/calvin_19871118.png"},
+    }
+
+
+def stub_scheduled_post(table_stub):
+    table_stub.add_response(
+        "get_item",
+        {
+            "Item": {
+                **comic_item(),
+                "slot_time": {"S": "1987-11-18T08:00:00Z"},
+                "text": {"S": "Prepared text"},
+                "posted": {"BOOL": False},
+            }
+        },
+    )
+    table_stub.add_response("update_item", {})  # claim slot
+    table_stub.add_response("transact_write_items", {})  # mark posted + stats
+    table_stub.add_response("update_item", {})  # mark slot posted
+
+
+def test_create_post_call_budget(scheduler, s3_stub, call_budget):
+    stub_image_download(s3_stub)
+    with Stubber(dynamodb.table.meta.client) as table_stub:
+        stub_scheduled_post(table_stub)
+
+        result = scheduler.create_post()
+
+    assert result["uri"].startswith("at://")
+    call_budget.assert_within(
+        {
+            "dynamodb.GetItem": 1,
+            "dynamodb.Scan": 0,
+            "dynamodb": 4,
+            "s3.GetObject": 1,
+            "s3": 1,
+            "bluesky": 3,
+        }
+    )
+
+
+def test_unscheduled_create_post_call_budget(scheduler, s3_stub, call_budget):
+    stub_image_download(s3_stub)
+    with Stubber(dynamodb.table.meta.client) as table_stub:
+        table_stub.add_response("get_item", {})  # empty calendar slot
+        table_stub.add_response(  # strips booked in upcoming slots
+            "batch_get_item", {"Responses": {dynamodb.STATE_TABLE_NAME: []}}
+        )
+        table_stub.add_response(
+            "scan", {"Items": [{"strip_date": comic_item()["strip_date"]}]}
+        )
+        table_stub.add_response("get_item", {"Item": comic_item()})
+        table_stub.add_response("update_item", {})  # claim slot
+        table_stub.add_response("transact_write_items", {})  # mark posted + stats
+
+        result = scheduler.create_post()
+
+    assert result["uri"].startswith("at://")
+    call_budget.assert_within(
+        {
+            "dynamodb.Scan": 1,
+            "dynamodb.GetItem": 2,
+            "dynamodb.BatchGetItem": 1,
+            "dynamodb": 6,
+            "s3.GetObject": 1,
+            "bluesky": 3,
+        }
+    )
+
+
+def test_warm_invocation_reuses_service_graph(container, s3_stub, call_budget):
+    scheduler = container.scheduler
+    for _ in range(2):
+        call_budget.reset()
+        stub_image_download(s3_stub)
+        with Stubber(dynamodb.table.meta.client) as table_stub:
+            stub_scheduled_post(table_stub)
+            assert container.scheduler.create_post()
+
+    assert container.scheduler is scheduler
+    call_budget.assert_within(
+        {
+            "bluesky.com.atproto.server.createSession": 0,
+            "bluesky": 2,
+            "sts": 0,
+        }
+    )
+
+
+def test_fetch_call_budget_per_strip(scheduler, s3_stub, call_budget):
+    with Stubber(dynamodb.table.meta.client) as table_stub:
+        table_stub.add_response("get_item", {})  # no interrupted-fetch cursor
+        table_stub.add_response(
+            "get_item",
+            {
+                "Item": {
+                    "pk": {"S": "STATS"},
+                    "unposted": {"N": "0"},
+                    "initialized": {"BOOL": True},
+                }
+            },
+        )
+        for _ in range(2):
+            table_stub.add_response("get_item", {})  # strip not stored yet
+            table_stub.add_response(
+                "batch_get_item", {"Responses": {dynamodb.STATE_TABLE_NAME: []}}
+            )
+            s3_stub.add_response("put_object", {})
+            table_stub.add_response("transact_write_items", {})  # comic + stats
+            table_stub.add_response("transact_write_items", {})  # hash buckets
+
+        assert scheduler.fetch_new_comics(count=2) == 2
+        table_stub.assert_no_pending_responses()
+
+    call_budget.assert_within(
+        {
+            "dynamodb.Scan": 0,
+            "dynamodb.GetItem": 4,
+            "dynamodb.BatchGetItem": 2,
+            "dynamodb": 10,
+            "s3.PutObject": 2,
+            "s3": 2,
+            "gocomics": 4,
+        }
+    )
+
+
+def test_prepare_call_budget(scheduler, call_budget, monkeypatch):
+    # Keep candidates in scan order so the stubbed reads line up with them
+    monkeypatch.setattr(random, "shuffle", lambda items: None)
+
+    def unposted(strip_date):
+        return {
+            "Item": {
+                **comic_item(),
+                "strip_date": {"S": strip_date},
+                "posted": {"BOOL": False},
+            }
+        }
+
+    with Stubber(dynamodb.table.meta.client) as table_stub:
+        table_stub.add_response(
+            "batch_get_item", {"Responses": {dynamodb.STATE_TABLE_NAME: []}}
+        )
+        table_stub.add_response(
+            "scan",
+            {
+                "Items": [
+                    {"strip_date": {"S": "1990-01-01T00:00:00"}},
+                    {"strip_date": {"S": "1991-01-01T00:00:00"}},
+                ]
+            },
+        )
+        # The day's first slot takes an anniversary strip, the others the backlog
+        for strip_date in (
+            "1986-10-19T00:00:00",
+            "1991-01-01T00:00:00",
+            "1990-01-01T00:00:00",
+        ):
+            table_stub.add_response("get_item", unposted(strip_date))
+            table_stub.add_response("put_item", {})
+
+        prepared = scheduler.calendar_service.prepare(
+            days=1, now=datetime(2026, 10, 19, 1, 0)
+        )
+        table_stub.assert_no_pending_responses()
+
+    assert prepared == 3
+    call_budget.assert_within(
+        {
+            "dynamodb.Scan": 1,
+            "dynamodb.BatchGetItem": 1,
+            "dynamodb.GetItem": 3,
+            "dynamodb": 8,
+            "gocomics": 0,
+            "s3": 0,
+        }
+    )
+
+
+def test_status_costs_one_get_item(scheduler, call_budget):
+    with Stubber(dynamodb.table.meta.client) as table_stub:
+        table_stub.add_response(
+            "get_item",
+            {
+                "Item": {
+                    "pk": {"S": "STATS"},
+                    "total": {"N": "12"},
+                    "unposted": {"N": "2"},
+                    "posted": {"N": "10"},
+                    "year_1987": {"N": "5"},
+                    "year_1990": {"N": "7"},
+                    "last_post_at": {"S": "2026-10-19T08:00:03"},
+                    "initialized": {"BOOL": True},
+                }
+            },
+        )
+
+        status = scheduler.get_status()
+
+    assert status["unposted"] == 2 and status["needs_refill"]
+    assert status["by_year"] == {1987: 5, 1990: 7}
+    assert status["last_fetch_at"] is None
+    call_budget.assert_within({"dynamodb.GetItem": 1, "dynamodb": 1})
+
+
+def test_budget_violation_reports_counts():
+    counter = CallCounter()
+    counter.record("s3", "PutObject")
+    counter.record("s3", "HeadObject")
+
+    counter.assert_within({"s3.PutObject": 1})
+    with pytest.raises(CallBudgetExceeded, match="s3: 2 calls"):
+        counter.assert_within({"s3": 1})
+
+
+def test_container_binds_the_db_layer_to_its_settings():
+    bench = Settings(
+        DYNAMODB_TABLE="Bench", STATE_TABLE="BenchState", AWS_REGION="eu-west-1"
+    )
+    try:
+        Container(bench)
+        assert (dynamodb.TABLE_NAME, dynamodb.STATE_TABLE_NAME) == (
+            "Bench",
+            "BenchState",
+        )
+        assert dynamodb.table.meta.client.meta.region_name == "eu-west-1"
+    finally:
+        dynamodb.init_db(get_settings())
+    assert dynamodb.TABLE_NAME == get_settings().DYNAMODB_TABLE
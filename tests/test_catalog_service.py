@@ -0,0 +1,123 @@
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from boto3.dynamodb.types import Binary
+from botocore.stub import Stubber
+
+from app.config import get_settings
+from app.database import dynamodb
+from app.services.catalog_service import CatalogIndex, CatalogService
+from app.utils import image_hash
+
+IMAGE_HASH = image_hash.to_hex(0x0123456789ABCDEF << 192 | 0xFEDCBA9876543210)
+
+
+def test_export_then_import_round_trips_the_catalog(tmp_path):
+    path = str(tmp_path / "catalog.jsonl.gz")
+    catalog = CatalogService(get_settings(), storage_service=object())
+
+    with Stubber(dynamodb.dynamodb.meta.client) as stub:
+        for strip_date, posted in (("1987-11-18", True), ("1987-11-19", False)):
+            stub.add_response(
+                "scan",
+                {
+                    "Items": [
+                        {
+                            "strip_date": {"S": f"{strip_date}T00:00:00"},
+                            "title": {"S": "Calvin and Hobbes"},
+                            "posted": {"BOOL": posted},
+                            "attempts": {"N": "2"},
+                            "score": {"N": "0.1"},
+                            "tags": {"SS": ["sunday", "snow"]},
+                            "image_hash": {"S": IMAGE_HASH},
+                            "thumbnail": {"B": b"\x89PNG"},
+                        }
+                    ]
+                },
+            )
+        assert catalog.export(path, total_segments=2) == 2
+
+    index = CatalogIndex.load(path)
+    assert len(index) == 2
+    record = index.get("1987-11-18T00:00:00")
+    assert record["attempts"] == 2
+    assert record["score"] == Decimal("0.1")
+    assert record["tags"] == {"snow", "sunday"}
+    assert record["thumbnail"] == Binary(b"\x89PNG")
+    assert [r["strip_date"] for r in index.unposted()] == ["1987-11-19T00:00:00"]
+    assert index.by_year() == {1987: 2}
+
+    with Stubber(dynamodb.dynamodb.meta.client) as stub:
+        stub.add_response("batch_write_item", {"UnprocessedItems": {}})
+        stub.add_response(
+            "scan",
+            {
+                "Items": [
+                    {
+                        "strip_date": {"S": "1987-11-18T00:00:00"},
+                        "posted": {"BOOL": True},
+                    },
+                    {"strip_date": {"S": "1987-11-19T00:00:00"}},
+                ]
+            },
+        )
+        stub.add_response(
+            "put_item",
+            {},
+            {
+                "TableName": dynamodb.STATE_TABLE_NAME,
+                "Item": {
+                    "pk": "STATS",
+                    "total": 2,
+                    "posted": 1,
+                    "unposted": 1,
+                    "year_1987": 2,
+                    "initialized": True,
+                },
+            },
+        )
+        for band, value in image_hash.bands(int(IMAGE_HASH, 16)):
+            stub.add_response(
+                "update_item",
+                {},
+                {
+                    "TableName": dynamodb.STATE_TABLE_NAME,
+                    "Key": {"pk": f"HASH#{band}#{value:02x}"},
+                    "UpdateExpression": "ADD entries :entries",
+                    "ExpressionAttributeValues": {
+                        ":entries": {
+                            f"{IMAGE_HASH}#1987-11-18T00:00:00",
+                            f"{IMAGE_HASH}#1987-11-19T00:00:00",
+                        }
+                    },
+                },
+            )
+        assert catalog.import_catalog(path) == 2
+        stub.assert_no_pending_responses()
+
+
+def test_export_stops_its_segment_scans_when_writing_fails(tmp_path):
+    catalog = CatalogService(
+        get_settings(), storage_service=object(), image_index=object()
+    )
+
+    def endless_segment(segment, total_segments):
+        while True:
+            yield [{"strip_date": "1987-11-18T00:00:00", "unwritable": object()}]
+
+    errors = []
+
+    def export():
+        try:
+            catalog.export(str(tmp_path / "catalog.jsonl.gz"), total_segments=2)
+        except TypeError as e:
+            errors.append(e)
+
+    with patch.object(dynamodb, "iter_comic_segment", endless_segment):
+        worker = threading.Thread(target=export, daemon=True)
+        worker.start()
+        worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert errors
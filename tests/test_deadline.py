@@ -0,0 +1,136 @@
+import json
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from app.config import Settings, get_settings
+from app.database import dynamodb
+from app.lambda_handler import fetch_comics
+from app.services.scheduler_service import FETCH_CURSOR, SchedulerService
+from app.services.storage_service import StorageService
+from app.utils.deadline import (
+    FIRST_RETRY_BACKOFF_SECONDS,
+    Deadline,
+    DeadlineExceeded,
+    boto3_config,
+    current_deadline,
+    deadline_scope,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeContext:
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:fetcher"
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+class TestDeadline(unittest.TestCase):
+    def test_request_timeouts_shrink_toward_the_deadline(self):
+        clock = FakeClock()
+        deadline = Deadline.from_context(
+            FakeContext(62000), reserve_ms=2000, clock=clock
+        )
+
+        self.assertEqual(deadline.timeout(30), 30)
+        clock.now = 50
+        self.assertEqual(deadline.timeout(30), 10)
+        clock.now = 60
+        with self.assertRaises(DeadlineExceeded):
+            deadline.timeout(30)
+
+    def test_aws_calls_started_before_the_deadline_end_within_the_reserve(self):
+        def worst_case(config):
+            attempts = config.retries["total_max_attempts"]
+            return (
+                attempts * (config.connect_timeout + config.read_timeout)
+                + (attempts - 1) * FIRST_RETRY_BACKOFF_SECONDS
+            )
+
+        for reserve_ms in (1000, 2000, 5000, 10000):
+            self.assertLessEqual(
+                worst_case(boto3_config(reserve_ms)), reserve_ms / 1000
+            )
+        self.assertEqual(boto3_config(5000).retries["total_max_attempts"], 2)
+
+        settings = get_settings()
+        storage = StorageService(settings)
+        for client in (dynamodb.dynamodb.meta.client, storage.s3_service.s3_client):
+            self.assertLessEqual(
+                worst_case(client.meta.config), settings.DEADLINE_RESERVE_MS / 1000
+            )
+
+    @patch("app.services.scheduler_service.dynamodb")
+    def test_fetch_stops_between_strips_and_saves_cursor(self, mock_db):
+        clock = FakeClock()
+        comic_service = MagicMock()
+        comic_service.get_unposted_comic_count.return_value = 0
+        comic_service.get_random_date.return_value = date(1990, 5, 5)
+        comic_service.save_comic.side_effect = lambda _: setattr(
+            clock, "now", clock.now + 20
+        )
+        mock_db.get_cursor.return_value = None
+        scheduler = SchedulerService(
+            Settings(FETCH_STRIP_SECONDS=15, BACKLOG_HIGH_WATER_MARK=10),
+            comic_service=comic_service,
+            bluesky_service=MagicMock(),
+            calendar_service=MagicMock(),
+        )
+
+        with deadline_scope(Deadline(50, clock=clock)) as deadline:
+            fetched = scheduler.fetch_new_comics()
+
+        self.assertEqual(fetched, 2)
+        self.assertTrue(deadline.interrupted)
+        mock_db.save_cursor.assert_called_once_with(FETCH_CURSOR, remaining=8)
+
+    @patch("app.services.scheduler_service.dynamodb")
+    def test_capped_resume_keeps_the_rest_of_the_cursor(self, mock_db):
+        comic_service = MagicMock()
+        comic_service.get_random_date.return_value = date(1990, 5, 5)
+        mock_db.get_cursor.return_value = {"remaining": 8}
+        scheduler = SchedulerService(
+            comic_service=comic_service,
+            bluesky_service=MagicMock(),
+            calendar_service=MagicMock(),
+        )
+
+        self.assertEqual(scheduler.fetch_new_comics(count=2), 2)
+
+        mock_db.save_cursor.assert_called_once_with(FETCH_CURSOR, remaining=6)
+        mock_db.clear_cursor.assert_not_called()
+
+    @patch("app.lambda_handler.get_container")
+    def test_interrupted_fetch_hands_off_to_a_new_invocation(self, mock_get_container):
+        container = mock_get_container.return_value
+        container.settings = Settings(REENQUEUE_ON_DEADLINE=True)
+
+        def run_out_of_time():
+            current_deadline().interrupted = True
+            return 3
+
+        container.scheduler.fetch_new_comics.side_effect = run_out_of_time
+
+        response = fetch_comics({"continuation": 1}, FakeContext(60000))
+
+        body = json.loads(response["body"])
+        self.assertFalse(body["complete"])
+        self.assertTrue(body["handedOff"])
+        invoke = container.lambda_client.invoke.call_args.kwargs
+        self.assertEqual(invoke["InvocationType"], "Event")
+        self.assertEqual(json.loads(invoke["Payload"]), {"continuation": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+from botocore.stub import ANY, Stubber
+
+from app.database import dynamodb
+from app.database.models import Comic
+
+
+def test_unposted_keys_are_projected_and_paginated():
+    with Stubber(dynamodb.table.meta.client) as stub:
+        stub.add_response(
+            "scan",
+            {
+                "Items": [{"strip_date": {"S": "1986-01-01"}}],
+                "LastEvaluatedKey": {"strip_date": {"S": "1986-01-01"}},
+            },
+            {
+                "TableName": dynamodb.TABLE_NAME,
+                "FilterExpression": ANY,
+                "ProjectionExpression": "#p0",
+                "ExpressionAttributeNames": ANY,
+            },
+        )
+        stub.add_response(
+            "scan",
+            {"Items": [{"strip_date": {"S": "1990-06-30"}}]},
+        )
+
+        assert dynamodb.get_unposted_strip_dates() == ["1986-01-01", "1990-06-30"]
+
+
+def test_comic_from_projected_item():
+    comic = Comic.from_item({"strip_date": "1987-11-18", "title": "Hobbes"})
+
+    assert comic.title == "Hobbes"
+    assert comic.url is None
+    assert comic.posted is False
+    assert not hasattr(comic, "__dict__")
+
+
+def test_save_comic_is_conditional_on_a_new_strip_date():
+    item = Comic("1987-11-18T00:00:00", "url", "title", "s3://calvobit/x.png").to_item()
+    with Stubber(dynamodb.table.meta.client) as stub:
+        stub.add_response("transact_write_items", {}, {"TransactItems": ANY})
+        stub.add_client_error(
+            "transact_write_items",
+            "TransactionCanceledException",
+            modeled_fields={
+                "CancellationReasons": [
+                    {"Code": "ConditionalCheckFailed"},
+                    {"Code": "None"},
+                ]
+            },
+        )
+
+        assert dynamodb.save_comic(item) == item
+        assert dynamodb.save_comic(item) is None
+
+
+def test_save_and_post_keep_stats_in_the_same_transaction():
+    item = Comic("1987-11-18T00:00:00", "url", "title", "s3://calvobit/x.png").to_item()
+    stats_updates = []
+
+    def record_stats_update(params, **kwargs):
+        stats_updates.append(params["TransactItems"][-1]["Update"])
+
+    client = dynamodb.dynamodb.meta.client
+    event = "provide-client-params.dynamodb.TransactWriteItems"
+    client.meta.events.register(event, record_stats_update)
+    try:
+        with Stubber(client) as stub:
+            stub.add_response("transact_write_items", {})
+            stub.add_response("transact_write_items", {})
+            dynamodb.save_comic(item)
+            dynamodb.mark_as_posted(item["strip_date"])
+    finally:
+        client.meta.events.unregister(event, record_stats_update)
+
+    saved, posted = stats_updates
+    assert saved["Key"] == posted["Key"] == dynamodb.STATS_KEY
+    assert set(saved["ExpressionAttributeNames"].values()) == {
+        "total",
+        "unposted",
+        "posted",
+        "year_1987",
+    }
+    assert saved["ExpressionAttributeValues"][":c1"] == 1
+    assert posted["ExpressionAttributeValues"][":c0"] == -1
+    assert "last_post_at" in posted["UpdateExpression"]
+
+
+def test_stats_created_by_counter_adds_alone_are_recounted():
+    # A table that predates STATS: the first post ADDs onto a missing item
+    with Stubber(dynamodb.table.meta.client) as stub:
+        stub.add_response(
+            "get_item",
+            {
+                "Item": {
+                    "pk": {"S": "STATS"},
+                    "unposted": {"N": "-1"},
+                    "posted": {"N": "1"},
+                    "last_post_at": {"S": "2026-10-19T08:00:03"},
+                }
+            },
+        )
+        stub.add_response(
+            "scan",
+            {
+                "Items": [
+                    {"strip_date": {"S": "1987-11-18"}, "posted": {"BOOL": True}},
+                    {"strip_date": {"S": "1990-06-30"}, "posted": {"BOOL": False}},
+                    {"strip_date": {"S": "1990-07-01"}},
+                ]
+            },
+        )
+        stub.add_response(
+            "put_item",
+            {},
+            {
+                "TableName": dynamodb.STATE_TABLE_NAME,
+                "Item": {
+                    "pk": "STATS",
+                    "total": 3,
+                    "unposted": 2,
+                    "posted": 1,
+                    "year_1987": 1,
+                    "year_1990": 2,
+                    "last_post_at": "2026-10-19T08:00:03",
+                    "initialized": True,
+                },
+            },
+        )
+
+        stats = dynamodb.get_stats()
+        stub.assert_no_pending_responses()
+
+    assert (stats["unposted"], stats["posted"]) == (2, 1)
@@ -0,0 +1,108 @@
+import io
+import itertools
+import random
+
+import pytest
+from botocore.stub import ANY, Stubber
+from PIL import Image, ImageDraw
+
+from app.config import get_settings
+from app.database import dynamodb
+from app.services.image_index_service import ImageIndexService, RejectedImage
+from app.utils import image_hash
+
+
+def strip_png(width=900, height=300, seed=0) -> bytes:
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for panel in range(3):
+        left = panel * width // 3 + 10
+        draw.rectangle([left, 10, left + width // 3 - 20, height - 10], outline="black")
+        draw.ellipse(
+            [left + 20 + seed * 15, 60, left + 120 + seed * 15, 200], fill="orange"
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bucket_response(*entries):
+    table = dynamodb.STATE_TABLE_NAME
+    items = [{"entries": {"SS": list(entries)}}] if entries else []
+    return {"Responses": {table: items}}
+
+
+def test_rescaled_copy_stays_within_duplicate_distance():
+    original = image_hash.decode_image(strip_png())
+    smaller = original.resize((600, 200))
+    other = image_hash.decode_image(strip_png(seed=4))
+
+    distance = image_hash.hamming_distance(
+        image_hash.dhash(original), image_hash.dhash(smaller)
+    )
+    assert distance <= get_settings().IMAGE_DUPLICATE_DISTANCE
+    assert image_hash.dhash(original) != image_hash.dhash(other)
+
+
+def line_strip(seed, width=1200, height=300, panels=4):
+    """A four-panel line drawing; every seed shares the same panel grid"""
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for panel in range(panels):
+        left = panel * width // panels + 10
+        right = left + width // panels - 20
+        draw.rectangle([left, 10, right, height - 10], outline="black", width=3)
+        for _ in range(6):
+            points = [
+                (rng.randint(left, right), rng.randint(10, height - 10))
+                for _ in range(2)
+            ]
+            draw.line(points, fill="black", width=3)
+        x, y = rng.randint(left, right - 60), rng.randint(20, height - 80)
+        draw.ellipse([x, y, x + 50, y + 60], outline="black", width=3)
+    return image
+
+
+def test_distinct_strips_on_the_same_panel_layout_are_not_duplicates():
+    drawings = [line_strip(seed) for seed in range(20)]
+    drawings += [image_hash.decode_image(strip_png(seed=seed)) for seed in (0, 1)]
+    hashes = [image_hash.dhash(drawing) for drawing in drawings]
+
+    closest = min(
+        image_hash.hamming_distance(a, b) for a, b in itertools.combinations(hashes, 2)
+    )
+    assert closest > get_settings().IMAGE_DUPLICATE_DISTANCE
+
+
+def test_check_rejects_duplicates_and_placeholders_with_one_lookup():
+    index = ImageIndexService(get_settings())
+    content = strip_png()
+    value = image_hash.dhash(image_hash.decode_image(content))
+    stored = image_hash.to_hex(value)
+
+    with Stubber(dynamodb.dynamodb.meta.client) as stub:
+        stub.add_response(
+            "batch_get_item",
+            bucket_response(f"{stored}#1987-11-18T00:00:00"),
+            {"RequestItems": ANY},
+        )
+        stub.add_response("batch_get_item", bucket_response(f"{stored}#junk"))
+        stub.add_response("batch_get_item", bucket_response())
+
+        with pytest.raises(RejectedImage, match="1987-11-18"):
+            index.check(content)
+        with pytest.raises(RejectedImage, match="placeholder"):
+            index.check(content)
+        assert index.check(content) == value
+
+
+def test_check_rejects_broken_blank_and_tiny_images_without_lookups():
+    index = ImageIndexService(get_settings())
+    blank = io.BytesIO()
+    Image.new("RGB", (900, 300), "white").save(blank, format="PNG")
+
+    with Stubber(dynamodb.dynamodb.meta.client):
+        for content in (b"<html>Not found</html>", blank.getvalue(), strip_png(120)):
+            with pytest.raises(RejectedImage):
+                index.check(content)
@@ -7,9 +7,9 @@ from app.lambda_handler import create_post, fetch_comics
 
 class TestLambdaHandlers(unittest.TestCase):
 
-    @patch("app.lambda_handler.SchedulerService")
-    def test_fetch_comics_success(self, MockSchedulerService):
-        mock_scheduler = MockSchedulerService.return_value
+    @patch("app.lambda_handler.get_container")
+    def test_fetch_comics_success(self, mock_get_container):
+        mock_scheduler = mock_get_container.return_value.scheduler
         mock_scheduler.fetch_new_comics.return_value = 5
 
         event, context = {}, {}
@@ -19,9 +19,9 @@ class TestLambdaHandlers(unittest.TestCase):
         body = json.loads(response["body"])
         self.assertIn("Successfully fetched 5 comics", body["message"])
 
-    @patch("app.lambda_handler.SchedulerService")
-    def test_fetch_comics_failure(self, MockSchedulerService):
-        mock_scheduler = MockSchedulerService.return_value
+    @patch("app.lambda_handler.get_container")
+    def test_fetch_comics_failure(self, mock_get_container):
+        mock_scheduler = mock_get_container.return_value.scheduler
         mock_scheduler.fetch_new_comics.side_effect = Exception("Fetch error")
 
         event, context = {}, {}
@@ -29,9 +29,9 @@ class TestLambdaHandlers(unittest.TestCase):
 
         self.assertEqual(response["statusCode"], 500)
 
-    @patch("app.lambda_handler.SchedulerService")
-    def test_create_post_success(self, MockSchedulerService):
-        mock_scheduler = MockSchedulerService.return_value
+    @patch("app.lambda_handler.get_container")
+    def test_create_post_success(self, mock_get_container):
+        mock_scheduler = mock_get_container.return_value.scheduler
         mock_scheduler.create_post.return_value = {"uri": "post123"}
 
         event, context = {}, {}
@@ -42,9 +42,9 @@ class TestLambdaHandlers(unittest.TestCase):
         self.assertIn("Successfully created post", body["message"])
         self.assertEqual(body["postId"], "post123")
 
-    @patch("app.lambda_handler.SchedulerService")
-    def test_create_post_no_posts_available(self, MockSchedulerService):
-        mock_scheduler = MockSchedulerService.return_value
+    @patch("app.lambda_handler.get_container")
+    def test_create_post_no_posts_available(self, mock_get_container):
+        mock_scheduler = mock_get_container.return_value.scheduler
         mock_scheduler.create_post.return_value = None
 
         event, context = {}, {}
@@ -52,9 +52,9 @@ class TestLambdaHandlers(unittest.TestCase):
 
         self.assertEqual(response["statusCode"], 400)
 
-    @patch("app.lambda_handler.SchedulerService")
-    def test_create_post_failure(self, MockSchedulerService):
-        mock_scheduler = MockSchedulerService.return_value
+    @patch("app.lambda_handler.get_container")
+    def test_create_post_failure(self, mock_get_container):
+        mock_scheduler = mock_get_container.return_value.scheduler
         mock_scheduler.create_post.side_effect = Exception("Post creation error")
 
         event, context = {}, {}
@@ -0,0 +1,60 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.utils.post_formatter import (
+    CAPTIONS,
+    MAX_POST_GRAPHEMES,
+    SUNDAY_CAPTIONS,
+    PostFormatter,
+    facets_from_item,
+    grapheme_length,
+)
+
+
+def test_render_indexes_hashtag_facets_in_utf8_bytes():
+    body = PostFormatter().render(datetime(1987, 11, 18), "Calvin and Hobbes")
+    encoded = body["text"].encode("utf-8")
+
+    tags = [
+        encoded[f["index"]["byteStart"] : f["index"]["byteEnd"]].decode()
+        for f in body["facets"]
+    ]
+    assert tags == ["#CalvinAndHobbes", "#Comics", "#Nostalgia"]
+    assert [f["features"][0]["tag"] for f in body["facets"]] == [
+        "CalvinAndHobbes",
+        "Comics",
+        "Nostalgia",
+    ]
+
+
+def test_render_is_sunday_and_anniversary_aware():
+    formatter = PostFormatter()
+    sunday = datetime(1990, 1, 7)
+
+    assert formatter.render(sunday)["text"].split("\n")[0] in SUNDAY_CAPTIONS
+    assert formatter.render(sunday, anniversary=True)["text"].startswith(
+        "On this day in 1990"
+    )
+
+
+def test_captions_do_not_repeat_until_the_pool_is_used_up():
+    formatter = PostFormatter()
+    weekday = datetime(1990, 1, 8)
+    captions = [formatter.caption_for(weekday) for _ in CAPTIONS]
+    assert sorted(captions) == sorted(CAPTIONS)
+
+
+def test_render_stays_within_the_grapheme_limit():
+    formatter = PostFormatter()
+    long_title = "👨‍👩‍👧 " * 200
+
+    body = formatter.render(datetime(1990, 1, 8), long_title)
+    assert grapheme_length(body["text"]) <= MAX_POST_GRAPHEMES
+    assert "#CalvinAndHobbes" in body["text"]
+    assert grapheme_length("👨‍👩‍👧🇺🇸é") == 3
+
+
+def test_facets_from_item_restores_int_offsets():
+    stored = [{"index": {"byteStart": Decimal(4), "byteEnd": Decimal(9)}}]
+    assert facets_from_item(stored)[0]["index"] == {"byteStart": 4, "byteEnd": 9}
+    assert facets_from_item(None) is None
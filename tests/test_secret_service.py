@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import MagicMock
+
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.services.secret_service import SecretService
+
+
+class TestSecretService(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.store = MagicMock()
+        self.store.get_parameter.return_value = "hunter2"
+        self.secrets = SecretService(
+            Settings(SECRETS_TTL_SECONDS=60), store=self.store, clock=lambda: self.now
+        )
+
+    def test_secrets_are_fetched_lazily_and_cached_until_ttl(self):
+        self.store.get_parameter.assert_not_called()
+
+        self.assertEqual(self.secrets.get("BLUESKY_PASSWORD"), "hunter2")
+        self.now = 59
+        self.secrets.get("BLUESKY_PASSWORD")
+        self.assertEqual(self.store.get_parameter.call_count, 1)
+
+        self.now = 61
+        self.secrets.get("BLUESKY_PASSWORD")
+        self.assertEqual(self.store.get_parameter.call_count, 2)
+
+    def test_invalidate_forces_refetch(self):
+        self.secrets.get("BLUESKY_PASSWORD")
+        self.secrets.invalidate("BLUESKY_PASSWORD")
+        self.secrets.get("BLUESKY_PASSWORD")
+
+        self.assertEqual(self.store.get_parameter.call_count, 2)
+
+    def test_settings_snapshot_is_frozen(self):
+        settings = Settings(S3_BUCKET_NAME="calvobit")
+
+        with self.assertRaises(ValidationError):
+            settings.S3_BUCKET_NAME = "other"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+from botocore.stub import Stubber
+
+from app.config import get_settings
+from app.database import dynamodb
+from app.services.s3_service import S3Service
+from app.services.storage_service import StorageService
+from app.services.sweeper_service import SweeperService
+
+
+def test_sweep_bulk_deletes_old_orphans_only(s3_stub):
+    settings = get_settings()
+    s3_service = S3Service(settings.S3_BUCKET_NAME, s3_client=s3_stub.client)
+    sweeper = SweeperService(
+        settings, storage_service=StorageService(settings, s3_service=s3_service)
+    )
+    old = datetime.now(timezone.utc) - timedelta(days=1)
+    new = datetime.now(timezone.utc)
+
+    with Stubber(dynamodb.dynamodb.meta.client) as db:
+        s3_stub.add_response(
+            "list_objects_v2",
+            {
+                "Contents": [
+                    {"Key": "calvin_19871118.png", "LastModified": old},
+                    {"Key": "calvin_19871119.png", "LastModified": old},
+                    {"Key": "calvin_19871120.png", "LastModified": new},
+                ]
+            },
+        )
+        db.add_response(
+            "scan",
+            {
+                "Items": [
+                    {
+                        # Keyed without a time: still references its image
+                        "strip_date": {"S": "1987-11-18"},
+                        "local_path": {"S": "s3://calvobit/calvin_19871118.png"},
+                    },
+                    {
+                        "strip_date": {"S": "1990-01-01T00:00:00"},
+                        "local_path": {"S": "s3://calvobit/calvin_19900101.png"},
+                    },
+                ]
+            },
+        )
+        s3_stub.add_response(
+            "delete_objects",
+            {},
+            {
+                "Bucket": settings.S3_BUCKET_NAME,
+                "Delete": {"Objects": [{"Key": "calvin_19871119.png"}], "Quiet": True},
+            },
+        )
+
+        report = sweeper.sweep(grace_minutes=60)
+
+    assert report == {"checked": 2, "orphans": 1, "deleted": 1, "missing_images": 1}